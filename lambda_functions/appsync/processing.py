@@ -13,9 +13,9 @@ Key Concepts Demonstrated:
 6. Error Handling - Graceful failure management in distributed systems
 
 Architecture Pattern:
-Client → AppSync startStream mutation → Request Lambda → SQS Queue → Processing Lambda (this function)
+Client → AppSync startStream mutation → SQS Queue (JS resolver) → Processing Lambda (this function)
     ↓
-Processing Lambda → Bedrock LLM streaming → GraphQL publishToken mutations → AppSync subscriptions
+Processing Lambda → Bedrock LLM streaming → GraphQL publishTokens mutations → AppSync subscriptions
     ↓
 AppSync → Real-time updates to subscribed clients
 
@@ -27,22 +27,414 @@ This pattern enables:
 - Enhanced resilience with SQS retries and dead-letter queues
 """
 
-import json
 import boto3
+import datetime
+import hashlib
+import hmac
+import logging
+import orjson
 import os
+import socket
+import threading
+import time
+import urllib3
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# AWS clients and credentials, created once per execution environment
+#
+# Lambda reuses the execution environment across warm invocations, so anything
+# created at module scope is initialized once and shared by every token and
+# every message handled by this container:
+# - The boto3 Session resolves the execution role credentials a single time
+# - The Bedrock client keeps its endpoint resolution and connection pool warm
+# - Refreshable (STS) credentials rotate themselves internally, so reading
+#   frozen credentials per request always returns a valid key pair
+_REGION = os.environ["AWS_REGION"]
+_SESSION = boto3.Session()
+_CREDENTIALS = _SESSION.get_credentials()
+
+# AppSync endpoint, read once from the environment configured by CDK
+# The host and path are part of every SigV4 canonical request, so the URL is
+# parsed once here instead of on every publish
+_APPSYNC_URL = os.environ["APPSYNC_API_URL"]
+_APPSYNC_HOST = urlsplit(_APPSYNC_URL).netloc
+_APPSYNC_PATH = urlsplit(_APPSYNC_URL).path or "/"
+
+# AppSync Event API endpoint (optional)
+# When the stack is deployed with `-c appsync_event_api=true`, token batches
+# are published straight to a pub/sub channel (/bedrock-stream/{sessionId})
+# with the Event API's HTTP publish call instead of a GraphQL mutation: no
+# query is parsed and no resolver runs per batch. Unset, the publishTokens
+# mutation is used.
+_EVENT_API_HOST = os.getenv("EVENT_API_HTTP_DOMAIN")
+_EVENT_API_URL = f"https://{_EVENT_API_HOST}/event" if _EVENT_API_HOST else None
+_EVENT_CHANNEL_NAMESPACE = os.getenv("EVENT_CHANNEL_NAMESPACE", "bedrock-stream")
+
+# Bedrock client configuration
+# - TCP keep-alive keeps the streaming connection healthy between events
+# - 32 pooled connections leave headroom over the up-to-10 parallel streams
+#   of a batch (botocore's default pool of 10 has none), so a stream never
+#   waits for a free connection
+# - Standard retry mode with 2 attempts retries throttling quickly without
+#   stalling the user behind long backoff chains
+# - 120 s read timeout tolerates long pauses between streamed events
+_BEDROCK_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=32,
+    retries={"mode": "standard", "max_attempts": 2},
+    read_timeout=120,
+)
+_BEDROCK = _SESSION.client("bedrock-runtime", config=_BEDROCK_CONFIG)
+
+# Session tracking table (optional)
+# The DynamoDB client is created once per execution environment and shares the
+# session's credentials. It is a low-level client rather than a Table resource:
+# the parallel streams of a batch and their publisher threads all write through
+# it, and boto3 clients are thread-safe while resources are not. Session writes
+# happen per token batch, never per token. Tracking is skipped if
+# SESSIONS_TABLE is not configured.
+_SESSIONS_TABLE = os.getenv("SESSIONS_TABLE") or None
+_DYNAMODB = (
+    _SESSION.client(
+        "dynamodb",
+        # Room for every parallel stream and its publisher thread at once
+        config=Config(tcp_keepalive=True, max_pool_connections=32),
+    )
+    if _SESSIONS_TABLE
+    else None
+)
+
+# Token history buffering
+# Streamed tokens are appended to the session item in batches (one UpdateItem
+# with list_append per batch), never one write per token. A batch is written
+# once it holds BUFFER_COUNT tokens or BUFFER_MS milliseconds have passed since
+# the previous write; the rest is written together with the final status.
+_PERSIST_MAX_TOKENS = int(os.getenv("BUFFER_COUNT", "25"))
+_PERSIST_MAX_SECONDS = int(os.getenv("BUFFER_MS", "250")) / 1000
+
+# Session expiry
+# Every session write refreshes expiresAt; DynamoDB TTL deletes the item once
+# it has not been updated for this long (default 24 hours).
+_SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "86400"))
+
+# Completed session cache
+# SQS delivers messages at least once, so a finished session can arrive again.
+# Sessions known to be completed are remembered in memory; a repeat delivery
+# to the same container is skipped without a DynamoDB read. "completed" is a
+# final status, so a cached entry can never be stale; the TTL only bounds how
+# long entries occupy memory.
+# TTLCache is not thread-safe (lookups and inserts also expire old entries),
+# and the messages of a batch are streamed on parallel threads, so every
+# access goes through _is_cached_completed/_cache_completed under this lock.
+_COMPLETED_SESSIONS = TTLCache(maxsize=1024, ttl=300)
+_COMPLETED_SESSIONS_LOCK = threading.Lock()
+
+# Maximum number of messages of one SQS batch that are streamed in parallel
+# (each with its own publisher thread and pooled AppSync connection)
+_MAX_PARALLEL_STREAMS = 10
+
+# Pooled HTTP client for AppSync GraphQL requests
+#
+# urllib.request opens a brand-new TCP + TLS connection for every call, so each
+# token paid a full handshake. A module-level PoolManager keeps a per-host
+# connection pool alive, so every publish after the first one in a container
+# reuses the same HTTPS connection to the AppSync endpoint.
+# urllib3 ships with botocore, so it is always available in the Lambda runtime.
+#
+# One SQS batch (up to _MAX_PARALLEL_STREAMS messages) is streamed in parallel,
+# each with its own publisher thread, so the pool holds one connection per
+# concurrent stream.
+#
+# Plain HTTP/1.1 keep-alive is deliberate: each stream has at most one publish
+# in flight (ordering is preserved by its single publisher thread), so HTTP/2
+# multiplexing would only save the handful of TLS handshakes per container,
+# while adding a pure-Python HTTP/2 stack (httpx + h2) to every request.
+#
+# - TCP keep-alive stops idle pooled connections from being dropped between
+#   warm invocations, so later invocations skip the TLS handshake too
+# - Short timeouts: a publish normally completes in milliseconds, so a stalled
+#   connection fails fast (and is retried) instead of stalling the stream
+_HTTP = urllib3.PoolManager(
+    maxsize=_MAX_PARALLEL_STREAMS,
+    timeout=urllib3.Timeout(connect=2, read=5),
+    retries=urllib3.Retry(total=2, backoff_factor=0.1),
+    socket_options=urllib3.connection.HTTPConnection.default_socket_options
+    + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+)
+
+# Logging
+#
+# Per-token events are logged at DEBUG through the standard logging module, so
+# a production LOG_LEVEL of INFO skips them entirely (arguments are formatted
+# only when the level is enabled) and no log line is written per publish.
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# JSON handling
+#
+# orjson encodes the GraphQL and Event API publish payloads and decodes their
+# responses and the SQS message bodies. Bedrock events are not among them:
+# converse_stream events arrive already decoded by botocore. orjson is several
+# times faster than the standard library json module and works on bytes
+# directly. It is shipped to the function in the AppSync dependencies layer
+# (see requirements.txt).
+
+# Token batching thresholds
+#
+# Tokens are buffered and published as one mutation when either limit is hit.
+# 16 tokens / 50 ms keeps the stream visually real-time while issuing roughly
+# an order of magnitude fewer AppSync mutations than one-per-token publishing.
+# Both limits can be tuned with PUBLISH_BATCH_COUNT / PUBLISH_BATCH_MS.
+#
+# A size limit (PUBLISH_BATCH_CHARS, default 2048 characters) flushes early
+# when a few large deltas arrive back to back, so a single publish never
+# grows large enough to delay delivery. Characters are counted with len(),
+# which costs nothing extra per token, rather than encoding to UTF-8 bytes.
+_BATCH_MAX_TOKENS = int(os.getenv("PUBLISH_BATCH_COUNT", "16"))
+_BATCH_MAX_SECONDS = int(os.getenv("PUBLISH_BATCH_MS", "50")) / 1000
+_BATCH_MAX_CHARS = int(os.getenv("PUBLISH_BATCH_CHARS", "2048"))
+
+# SigV4 signing key cache
+#
+# The SigV4 signing key is derived with four chained HMACs over the secret key,
+# date, region and service, and only changes when the date rolls over or the
+# credentials rotate. Caching it keyed by (access key, date) leaves a single
+# HMAC of the string-to-sign per request instead of five.
+_SIGNING_KEYS = {}
+
+# Constant head of the canonical request: method, path and (empty) query string
+_CANONICAL_REQUEST_PREFIX = f"POST\n{_APPSYNC_PATH}\n\n"
+_EVENT_CANONICAL_REQUEST_PREFIX = "POST\n/event\n\n"
+
+
+def _get_signing_key(secret_key, access_key, short_date):
+    """
+    Return the SigV4 signing key for AppSync, deriving it at most once per day
 
-def publish_token_to_appsync(
-    session_id, token, is_complete, sequence, appsync_url, region
+    kSigning = HMAC(HMAC(HMAC(HMAC("AWS4" + secret, date), region), service),
+                    "aws4_request")
+    """
+    cache_key = (access_key, short_date)
+    signing_key = _SIGNING_KEYS.get(cache_key)
+    if signing_key is None:
+        signing_key = ("AWS4" + secret_key).encode("utf-8")
+        for part in (short_date, _REGION, "appsync", "aws4_request"):
+            signing_key = hmac.new(
+                signing_key, part.encode("utf-8"), hashlib.sha256
+            ).digest()
+
+        # Only the current date and credentials are ever needed again
+        _SIGNING_KEYS.clear()
+        _SIGNING_KEYS[cache_key] = signing_key
+    return signing_key
+
+
+def _sign_request(
+    body, host=_APPSYNC_HOST, canonical_prefix=_CANONICAL_REQUEST_PREFIX
 ):
     """
-    Publish LLM tokens to AppSync using GraphQL mutations with IAM authentication
+    Build SigV4 headers for a POST of `body` to an AppSync endpoint
+
+    A minimal SigV4 signer specialised for this one request shape: the method,
+    path, query string and signed header names never change, so only the
+    timestamp, payload hash and signature are computed per request. The
+    GraphQL and Event API endpoints both sign for the "appsync" service, so
+    they share the cached signing key.
+
+    Args:
+        body (bytes): Exact request body that will be sent
+        host (str): Endpoint host (the GraphQL API unless given)
+        canonical_prefix (str): Method, path and query string of the request
+
+    Returns:
+        dict: Headers to send with the request, including Authorization
+    """
+    credentials = _CREDENTIALS.get_frozen_credentials()
+    amz_date = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    short_date = amz_date[:8]
+
+    headers = {
+        "Content-Type": "application/json",
+        "Host": host,
+        "X-Amz-Date": amz_date,
+    }
+    if credentials.token:
+        headers["X-Amz-Security-Token"] = credentials.token
+
+    # Canonical request: header names must be lowercase and sorted, which
+    # the insertion order above already guarantees
+    signed_headers = ";".join(name.lower() for name in headers)
+    canonical_headers = "".join(
+        f"{name.lower()}:{value}\n" for name, value in headers.items()
+    )
+    canonical_request = canonical_prefix + "\n".join(
+        (canonical_headers, signed_headers, hashlib.sha256(body).hexdigest())
+    )
+
+    scope = f"{short_date}/{_REGION}/appsync/aws4_request"
+    string_to_sign = "\n".join(
+        (
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        )
+    )
+    signing_key = _get_signing_key(
+        credentials.secret_key, credentials.access_key, short_date
+    )
+    signature = hmac.new(
+        signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+    headers["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={credentials.access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    headers["Accept"] = "application/json"
+    headers["Connection"] = "keep-alive"
+    return headers
+
+
+# GraphQL Mutation Definition
+# This mutation matches the schema defined in AppSync and triggers real-time
+# subscriptions to connected clients. Subscribers only receive the fields in
+# this selection set, so it lists every field the clients subscribe to.
+_PUBLISH_TOKENS_MUTATION = """
+mutation PublishTokens($sessionId: String!, $tokens: [String!]!, $isComplete: Boolean!) {
+    publishTokens(sessionId: $sessionId, tokens: $tokens, isComplete: $isComplete) {
+        sessionId
+        token
+        tokens
+        isComplete
+        timestamp
+    }
+}
+"""
+
+# Pre-encoded request body framing
+# The query text never changes, so the {"query": ..., "variables": part of the
+# standard GraphQL request body is encoded once; each publish only serializes
+# its small variables object and concatenates the bytes.
+_PUBLISH_TOKENS_BODY_PREFIX = (
+    b'{"query":' + orjson.dumps(_PUBLISH_TOKENS_MUTATION) + b',"variables":'
+)
+_PUBLISH_TOKENS_BODY_SUFFIX = b"}"
+
+
+def _execute_graphql(json_data):
+    """
+    Sign and send a GraphQL request to AppSync using IAM authentication
+
+    Shared transport for every mutation this function publishes. It signs the
+    request with SigV4 and sends it over the pooled HTTPS connection.
+
+    Args:
+        json_data (bytes): Encoded GraphQL request body (query and variables)
+
+    Returns:
+        bool: True if the request succeeded without GraphQL errors, False otherwise
+    """
+    # Apply SigV4 authentication signature
+    # This signs the request using the Lambda's IAM role credentials with
+    # the cached signing key. AppSync will validate this signature before
+    # executing the mutation
+    headers = _sign_request(json_data)
+
+    # Execute the signed GraphQL request over the pooled connection
+    # (the pool's connect/read timeouts prevent hanging on slow responses)
+    response = _HTTP.request(
+        "POST",
+        _APPSYNC_URL,
+        body=json_data,
+        headers=headers,
+    )
+
+    # Unlike urlopen, urllib3 does not raise on HTTP error statuses
+    if response.status != 200:
+        print(f"❌ AppSync returned HTTP {response.status}: {response.data!r}")
+        return False
+
+    result = orjson.loads(response.data)
+
+    # Check for GraphQL errors in the response
+    # Even successful HTTP requests can contain GraphQL errors
+    if "errors" in result:
+        print(f"❌ GraphQL errors: {result['errors']}")
+        return False
+
+    return True
+
+
+def _publish_event(session_id, tokens, is_complete, start_sequence):
+    """
+    Publish a batch of tokens to the session's AppSync Event API channel
+
+    One signed HTTP publish per batch: the event carries the same fields as
+    the onTokenReceived subscription payload, plus the sequence number of its
+    first token, so clients handle both transports identically.
+
+    Args:
+        session_id (str): Session whose channel receives the event
+        tokens (list[str]): Tokens in generation order
+        is_complete (bool): Whether this batch ends the stream
+        start_sequence (int): Sequence number of the first token in the batch
+
+    Returns:
+        bool: True if the event was accepted, False otherwise
+    """
+    event = {
+        "sessionId": session_id,
+        "token": "",
+        "tokens": tokens,
+        "isComplete": is_complete,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "sequence": start_sequence,
+    }
+    # Events are published as JSON-encoded strings inside the request body
+    body = orjson.dumps(
+        {
+            "channel": f"/{_EVENT_CHANNEL_NAMESPACE}/{session_id}",
+            "events": [orjson.dumps(event).decode("utf-8")],
+        }
+    )
+    headers = _sign_request(body, _EVENT_API_HOST, _EVENT_CANONICAL_REQUEST_PREFIX)
+    response = _HTTP.request("POST", _EVENT_API_URL, body=body, headers=headers)
+
+    if response.status != 200:
+        print(f"❌ Event API returned HTTP {response.status}: {response.data!r}")
+        return False
+
+    # A 200 response can still report individual events as failed
+    failed = orjson.loads(response.data).get("failed")
+    if failed:
+        print(f"❌ Event API rejected events: {failed}")
+        return False
+
+    return True
+
+
+def publish_tokens_to_appsync(session_id, tokens, is_complete, start_sequence):
+    """
+    Publish a batch of LLM tokens to AppSync in a single GraphQL mutation
 
     This function demonstrates how to programmatically execute GraphQL mutations
     from within a Lambda function using AWS SigV4 authentication. This pattern
     enables service-to-service communication in a secure, scalable way.
 
+    Publishing every Bedrock delta as its own mutation costs one SigV4 signature,
+    one HTTPS round trip and one AppSync request per token. Coalescing adjacent
+    tokens into a small batch keeps the stream real-time for the user while
+    cutting the number of mutations by an order of magnitude. The last batch of
+    a stream carries isComplete=True, so no separate completion mutation is sent.
+
+    Subscribers receive the batch through the onTokenReceived subscription and
+    simply concatenate the tokens array in order.
+
     Key Concepts:
     - GraphQL Mutations: Programmatic execution of schema operations
     - SigV4 Authentication: AWS signature-based authentication for APIs
@@ -50,106 +442,170 @@ def publish_token_to_appsync(
     - Error Handling: Graceful failure management for GraphQL operations
 
     Authentication Flow:
-    1. Lambda retrieves IAM credentials from execution role
-    2. SigV4Auth signs the GraphQL request with temporary credentials
+    1. Lambda reuses the IAM credentials resolved from the execution role at startup
+    2. The SigV4 signer signs the GraphQL request with temporary credentials
     3. AppSync validates the signature and executes the mutation
     4. Mutation triggers subscriptions to connected clients
 
     Args:
         session_id (str): Unique identifier for the streaming session
-        token (str): LLM-generated text token to publish
-        is_complete (bool): Whether this is the final token in the stream
-        sequence (int): Token sequence number for ordering
-        appsync_url (str): GraphQL endpoint URL for AppSync API
-        region (str): AWS region for SigV4 signing
+        tokens (list[str]): LLM-generated text tokens, in generation order
+        is_complete (bool): Whether this batch ends the stream
+        start_sequence (int): Sequence number of the first token in the batch
 
     Returns:
         bool: True if publication successful, False otherwise
 
     GraphQL Mutation Schema:
-    mutation PublishToken($sessionId: String!, $token: String!, $isComplete: Boolean!) {
-        publishToken(sessionId: $sessionId, token: $token, isComplete: $isComplete) {
+    mutation PublishTokens($sessionId: String!, $tokens: [String!]!, $isComplete: Boolean!) {
+        publishTokens(sessionId: $sessionId, tokens: $tokens, isComplete: $isComplete) {
             sessionId
             token
+            tokens
             isComplete
             timestamp
         }
     }
     """
     try:
-        # Import AWS authentication libraries for SigV4 signing
-        # These libraries enable secure service-to-service communication
-        from botocore.auth import SigV4Auth
-        from botocore.awsrequest import AWSRequest
-        import urllib.request
-
-        # GraphQL Mutation Definition
-        # This mutation matches the schema defined in AppSync and triggers
-        # real-time subscriptions to connected clients
-        mutation = """
-        mutation PublishToken($sessionId: String!, $token: String!, $isComplete: Boolean!) {
-            publishToken(sessionId: $sessionId, token: $token, isComplete: $isComplete) {
-                sessionId
-                token
-                isComplete
-                timestamp
+        if _EVENT_API_URL is not None:
+            # Event API deployments publish to the session's channel instead
+            if not _publish_event(session_id, tokens, is_complete, start_sequence):
+                return False
+        else:
+            # Prepare GraphQL request payload
+            # Only the variables are serialized per call; orjson produces UTF-8
+            # bytes that are spliced into the pre-encoded query framing
+            variables = {
+                "sessionId": session_id,
+                "tokens": tokens,
+                "isComplete": is_complete,
             }
-        }
-        """
-
-        # Prepare GraphQL request payload
-        # Standard GraphQL request format with query and variables
-        variables = {"sessionId": session_id, "token": token, "isComplete": is_complete}
-        payload = {"query": mutation, "variables": variables}
-        json_data = json.dumps(payload).encode("utf-8")
-
-        # AWS Authentication Setup
-        # Retrieve credentials from Lambda execution role for SigV4 signing
-        session = boto3.Session()
-        credentials = session.get_credentials()
-
-        # Create AWS request object for SigV4 authentication
-        # This ensures the request is properly signed with IAM credentials
-        request = AWSRequest(
-            method="POST",
-            url=appsync_url,
-            data=json_data,
-            headers={"Content-Type": "application/json", "Accept": "application/json"},
+            json_data = (
+                _PUBLISH_TOKENS_BODY_PREFIX
+                + orjson.dumps(variables)
+                + _PUBLISH_TOKENS_BODY_SUFFIX
+            )
+            if not _execute_graphql(json_data):
+                return False
+
+        logger.debug(
+            "✅ Published tokens %d-%d to AppSync for session %s",
+            start_sequence,
+            start_sequence + len(tokens) - 1,
+            session_id,
         )
+        return True
 
-        # Apply SigV4 authentication signature
-        # This signs the request using the Lambda's IAM role credentials
-        # AppSync will validate this signature before executing the mutation
-        SigV4Auth(credentials, "appsync", region).add_auth(request)
+    except Exception as e:
+        # Handle any errors during GraphQL publication
+        # Common errors: network issues, authentication failures, schema mismatches
+        print(f"❌ Error publishing token batch to AppSync: {str(e)}")
+        return False
 
-        # Execute the signed GraphQL request
-        # Convert botocore request to urllib request and send to AppSync
-        req = urllib.request.Request(
-            appsync_url, data=json_data, headers=dict(request.headers)
+
+def update_session_status(session_id, status, token_count=None, tokens=None):
+    """
+    Record the status of a streaming session in the sessions table
+
+    Session tracking is best-effort: a failed write is logged but never
+    interrupts the stream that users are waiting on.
+
+    Args:
+        session_id (str): Session being tracked (table partition key)
+        status (str): "streaming", "completed" or "error"
+        token_count (int, optional): Tokens streamed so far
+        tokens (list, optional): New tokens to append to the stored history
+    """
+    if _SESSIONS_TABLE is None:
+        return
+
+    update_expression = (
+        "SET #status = :status, updatedAt = :updated, expiresAt = :expires"
+    )
+    # The low-level client takes typed attribute values ({"S": ...}, {"N": ...})
+    values = {
+        ":status": {"S": status},
+        ":updated": {
+            "S": datetime.datetime.now(datetime.timezone.utc).isoformat()
+        },
+        # Epoch seconds, as DynamoDB TTL requires
+        ":expires": {"N": str(int(time.time()) + _SESSION_TTL_SECONDS)},
+    }
+    if token_count is not None:
+        update_expression += ", tokenCount = :count"
+        values[":count"] = {"N": str(token_count)}
+    if tokens:
+        # Append in a single write; if_not_exists starts the list on first use
+        update_expression += (
+            ", tokens = list_append(if_not_exists(tokens, :empty), :tokens)"
+        )
+        values[":empty"] = {"L": []}
+        values[":tokens"] = {"L": [{"S": token} for token in tokens]}
+
+    try:
+        _DYNAMODB.update_item(
+            TableName=_SESSIONS_TABLE,
+            Key={"sessionId": {"S": session_id}},
+            UpdateExpression=update_expression,
+            ExpressionAttributeNames={"#status": "status"},  # reserved word
+            ExpressionAttributeValues=values,
         )
+    except Exception as e:
+        print(f"⚠️ PROCESSOR: Could not update session {session_id} status: {e}")
 
-        # Send request and handle response
-        # 30-second timeout prevents hanging on slow AppSync responses
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.loads(response.read().decode("utf-8"))
 
-            # Check for GraphQL errors in the response
-            # Even successful HTTP requests can contain GraphQL errors
-            if "errors" in result:
-                print(f"❌ GraphQL errors: {result['errors']}")
-                return False
+def _is_cached_completed(session_id):
+    """Return True if the session is in the completed session cache"""
+    with _COMPLETED_SESSIONS_LOCK:
+        return session_id in _COMPLETED_SESSIONS
+
+
+def _cache_completed(session_id):
+    """Remember a session as completed in the completed session cache"""
+    with _COMPLETED_SESSIONS_LOCK:
+        _COMPLETED_SESSIONS[session_id] = True
+
+
+def is_session_completed(session_id):
+    """
+    Check whether a session has already been streamed to completion
+
+    Looks in the in-memory cache first and falls back to a GetItem of the
+    session's status. Only completed sessions are cached.
 
-        print(f"✅ Successfully published token to AppSync for session {session_id}")
+    Args:
+        session_id (str): Session to check
+
+    Returns:
+        bool: True if the session finished streaming earlier
+    """
+    if _is_cached_completed(session_id):
         return True
+    if _SESSIONS_TABLE is None:
+        return False
 
+    try:
+        item = _DYNAMODB.get_item(
+            TableName=_SESSIONS_TABLE,
+            Key={"sessionId": {"S": session_id}},
+            ProjectionExpression="#status",
+            ExpressionAttributeNames={"#status": "status"},
+        ).get("Item")
     except Exception as e:
-        # Handle any errors during GraphQL publication
-        # Common errors: network issues, authentication failures, schema mismatches
-        print(f"❌ Error publishing token to AppSync: {str(e)}")
+        # If the check fails, stream anyway; a duplicate beats a lost response
+        print(f"⚠️ PROCESSOR: Could not read session {session_id} status: {e}")
         return False
 
+    completed = (
+        item is not None and item.get("status", {}).get("S") == "completed"
+    )
+    if completed:
+        _cache_completed(session_id)
+    return completed
+
 
-def process_streaming_request(message_body):
+def process_streaming_request(message_body, receive_count=1):
     """
     Process a single LLM streaming request from an SQS message
 
@@ -159,6 +615,7 @@ def process_streaming_request(message_body):
 
     Args:
         message_body (dict): The parsed JSON body of the SQS message
+        receive_count (int): The record's ApproximateReceiveCount
 
     Returns:
         bool: True if processing was successful, False otherwise
@@ -166,82 +623,167 @@ def process_streaming_request(message_body):
     prompt = message_body["prompt"]
     session_id = message_body["sessionId"]
 
-    # Get configuration from environment variables
-    # These are set by CDK during deployment
-    appsync_api_url = os.environ["APPSYNC_API_URL"]
-    region = os.environ["AWS_REGION"]
+    # Skip duplicate deliveries of a session that already completed
+    # A first delivery only checks the in-memory cache; the stored status is
+    # read for redeliveries alone, so a fresh session never waits on a
+    # DynamoDB GetItem before its first token
+    if _is_cached_completed(session_id) or (
+        receive_count > 1 and is_session_completed(session_id)
+    ):
+        print(f"⏭️ PROCESSOR: Session {session_id} already completed, skipping")
+        return True
 
     print(f"🚀 PROCESSOR: Starting Bedrock stream for session: {session_id}")
     print(f"📝 PROCESSOR: Prompt preview: '{prompt[:100]}...'")  # Truncate for privacy
 
-    try:
-        # Initialize Bedrock Runtime client for LLM model invocation
-        bedrock_runtime = boto3.client("bedrock-runtime")
+    # Stream state lives outside the try block so the error path can send
+    # any tokens that were buffered but not yet published
+    token_count = 0
+    buffer = []
+    buffer_chars = 0
+    # Tokens not yet appended to the session's stored history
+    history = []
 
+    try:
         # Invoke Claude 3.5 Sonnet with streaming response
         # This enables real-time token generation as the LLM formulates its response
         print(f"🤖 PROCESSOR: Invoking Claude 3.5 Sonnet model...")
-        response = bedrock_runtime.invoke_model_with_response_stream(
+        # The Bedrock Runtime client is shared across invocations (see module scope)
+        #
+        # The Converse Streaming API returns typed events (contentBlockDelta
+        # carries the text directly), so unlike invoke_model_with_response_stream
+        # there is no model-specific JSON payload to decode for every token
+        response = _BEDROCK.converse_stream(
             modelId="anthropic.claude-3-5-sonnet-20240620-v1:0",
-            body=json.dumps(
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "messages": [{"role": "user", "content": prompt}],
-                    # Optional: Add system prompts, temperature, etc.
-                    # "system": "You are a helpful AI assistant...",
-                    # "temperature": 0.7,
-                    # "top_p": 0.9
-                }
-            ),
-            contentType="application/json",
-            accept="application/json",
+            messages=[{"role": "user", "content": [{"text": prompt}]}],
+            inferenceConfig={
+                "maxTokens": 1000,
+                # Optional: Add temperature, top_p, etc.
+                # "temperature": 0.7,
+                # "topP": 0.9,
+            },
+            # Optional: Add a system prompt
+            # system=[{"text": "You are a helpful AI assistant..."}],
         )
 
         # Process streaming response from Bedrock
-        # Each chunk contains different types of data; we filter for text content
-        token_count = 0
+        # Each event contains different types of data; we filter for text content
         print(f"📡 PROCESSOR: Beginning real-time token streaming...")
 
-        for chunk in response["body"]:
-            if "chunk" in chunk:
-                # Decode the binary chunk data to JSON
-                chunk_data = json.loads(chunk["chunk"]["bytes"].decode("utf-8"))
-
-                # Filter for actual text content chunks
-                if chunk_data.get("type") == "content_block_delta":
-                    text = chunk_data.get("delta", {}).get("text", "")
-                    if text:
-                        token_count += 1
-
-                        # Publish each token immediately to AppSync
-                        # This triggers real-time subscriptions to connected clients
-                        success = publish_token_to_appsync(
+        # Tokens are buffered and flushed as a single publishTokens mutation
+        # once the batch is full or has been waiting longer than the time limit
+        last_flush = time.monotonic()
+        last_persist = last_flush
+
+        # Publishing runs on a background thread so the next Bedrock chunks
+        # are read while the previous batch is still in flight to AppSync.
+        # A single worker keeps batches in order for subscribers; the `with`
+        # block waits for any outstanding publishes before it exits, even if
+        # the Bedrock stream raises.
+        futures = []
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="appsync-publish"
+        ) as publisher:
+            # Bind hot-loop callables to locals: local lookups are cheaper than
+            # global + attribute lookups repeated for every Bedrock event
+            monotonic = time.monotonic
+            submit = publisher.submit
+
+            # Mark the session as streaming (on the publisher thread, so the
+            # DynamoDB write never delays the first token)
+            futures.append(submit(update_session_status, session_id, "streaming"))
+
+            for stream_event in response["stream"]:
+                # Filter for actual text content events
+                # messageStart, contentBlockStop, messageStop and metadata
+                # events carry no text, so bail out as early as possible
+                block_delta = stream_event.get("contentBlockDelta")
+                if block_delta is None:
+                    continue
+                text = block_delta["delta"].get("text")
+                if not text:
+                    continue
+
+                token_count += 1
+                buffer.append(text)
+                buffer_chars += len(text)
+                history.append(text)
+
+                # Hand the buffered tokens to the publisher thread
+                # This triggers real-time subscriptions to connected clients
+                if (
+                    len(buffer) >= _BATCH_MAX_TOKENS
+                    or buffer_chars >= _BATCH_MAX_CHARS
+                    or monotonic() - last_flush > _BATCH_MAX_SECONDS
+                ):
+                    futures.append(
+                        submit(
+                            publish_tokens_to_appsync,
                             session_id=session_id,
-                            token=text,
+                            tokens=buffer,
                             is_complete=False,
-                            sequence=token_count,
-                            appsync_url=appsync_api_url,
-                            region=region,
+                            start_sequence=token_count - len(buffer) + 1,
                         )
-
-                        # Log progress for monitoring (could add metrics here)
-                        if token_count % 10 == 0:  # Log every 10 tokens
-                            print(f"📊 PROCESSOR: Published {token_count} tokens...")
-
-        # Send completion notification to indicate streaming is finished
+                    )
+                    buffer = []
+                    buffer_chars = 0
+                    last_flush = monotonic()
+
+                # Append buffered tokens to the session history in DynamoDB
+                # (queued behind the publishes on the same background thread)
+                if _SESSIONS_TABLE is not None and (
+                    len(history) >= _PERSIST_MAX_TOKENS
+                    or monotonic() - last_persist > _PERSIST_MAX_SECONDS
+                ):
+                    futures.append(
+                        submit(
+                            update_session_status,
+                            session_id,
+                            "streaming",
+                            token_count,
+                            history,
+                        )
+                    )
+                    history = []
+                    last_persist = monotonic()
+
+                # Log progress for monitoring (could add metrics here)
+                if token_count % 10 == 0:  # Log every 10 tokens
+                    print(f"📊 PROCESSOR: Streamed {token_count} tokens...")
+
+            # Flush the remaining tokens as the final batch
+            # The final batch carries isComplete=True, which tells subscribers
+            # the stream has ended; it is sent even when no tokens are left so
+            # there is always exactly one completion event per stream
+            futures.append(
+                submit(
+                    publish_tokens_to_appsync,
+                    session_id=session_id,
+                    tokens=buffer,
+                    is_complete=True,
+                    start_sequence=token_count - len(buffer) + 1,
+                )
+            )
+            buffer = []
+            # The final status write also stores any tokens still buffered
+            futures.append(
+                submit(
+                    update_session_status,
+                    session_id,
+                    "completed",
+                    token_count,
+                    history,
+                )
+            )
+            history = []
+
+            # Every batch must reach AppSync before the stream is reported done
+            wait(futures)
+
+        _cache_completed(session_id)
         print(
             f"✅ PROCESSOR: Stream completed successfully. Total tokens: {token_count}"
         )
-        publish_token_to_appsync(
-            session_id=session_id,
-            token="",  # Empty token indicates completion
-            is_complete=True,
-            sequence=token_count + 1,
-            appsync_url=appsync_api_url,
-            region=region,
-        )
-
         return True
 
     except Exception as e:
@@ -250,15 +792,15 @@ def process_streaming_request(message_body):
         print(f"❌ PROCESSOR: Error during streaming: {error_message}")
 
         # Notify clients of the error through AppSync
-        # This ensures users get feedback even when things go wrong
-        publish_token_to_appsync(
+        # The error is appended to the tokens still waiting in the buffer and
+        # sent as the final batch, so users get feedback even when things go wrong
+        publish_tokens_to_appsync(
             session_id=session_id,
-            token=f"Error: {error_message}",
+            tokens=buffer + [f"Error: {error_message}"],
             is_complete=True,
-            sequence=999,  # High sequence number for error messages
-            appsync_url=appsync_api_url,
-            region=region,
+            start_sequence=token_count - len(buffer) + 1,
         )
+        update_session_status(session_id, "error", token_count, history)
 
         return False
 
@@ -275,6 +817,7 @@ def lambda_handler(event, context):
     - Provides automatic retries and dead-letter queue capabilities
     - Allows for graceful failure handling and improved resilience
     - Enables horizontal scaling through SQS's distributed nature
+    - Streams every message of a batch in parallel on worker threads
 
     Real-time Publishing Pattern:
     - Streams LLM responses in real-time as they're generated
@@ -299,7 +842,20 @@ def lambda_handler(event, context):
 
     Environment Variables Required:
     - APPSYNC_API_URL: GraphQL endpoint for publishing tokens
+    - EVENT_API_HTTP_DOMAIN (optional): AppSync Event API HTTP domain; when
+      set, token batches are published to Event API channels instead
+    - EVENT_CHANNEL_NAMESPACE (optional): Channel namespace (default
+      bedrock-stream)
+    - SESSIONS_TABLE (optional): DynamoDB table for session status tracking
+    - BUFFER_COUNT / BUFFER_MS (optional): Token history write batching
+      (default 25 tokens / 250 ms)
+    - SESSION_TTL_SECONDS (optional): Session item lifetime after its last
+      update (default 86400)
+    - PUBLISH_BATCH_COUNT / PUBLISH_BATCH_MS / PUBLISH_BATCH_CHARS
+      (optional): publishTokens batching (default 16 tokens / 50 ms /
+      2048 characters)
     - AWS_REGION: AWS region for service calls
+    - LOG_LEVEL (optional): DEBUG enables per-publish logging (default INFO)
 
     Returns:
         dict: Batch item failures if any messages couldn't be processed
@@ -312,34 +868,54 @@ def lambda_handler(event, context):
     """
     print(f"📥 Received SQS event with {len(event.get('Records', []))} messages")
 
-    # Initialize tracking for failed messages
-    failed_message_ids = []
+    records = event.get("Records", [])
 
-    # Process each message in the batch
-    for record in event.get("Records", []):
+    def process_record(record):
+        """Process one SQS record; return a batch item failure or None"""
         message_id = record["messageId"]
         print(f"⚙️ Processing message {message_id}")
 
         try:
             # Parse the message body (which is a JSON string)
-            message_body = json.loads(record["body"])
+            message_body = orjson.loads(record["body"])
 
             # Process this specific streaming request
-            success = process_streaming_request(message_body)
+            # Redeliveries (receive count > 1) also check the session table
+            receive_count = int(
+                record.get("attributes", {}).get("ApproximateReceiveCount", 1)
+            )
+            success = process_streaming_request(message_body, receive_count)
 
             if not success:
                 # Mark message for retry by including it in failed list
-                failed_message_ids.append({"itemIdentifier": message_id})
                 print(f"❌ Failed to process message {message_id}, will be retried")
+                return {"itemIdentifier": message_id}
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"❌ Failed to parse message {message_id}: Invalid JSON: {str(e)}")
             # Don't retry messages with invalid JSON - they'll never succeed
 
         except Exception as e:
             # For any other exceptions, mark the message for retry
             print(f"⚠️ Unexpected error processing message {message_id}: {str(e)}")
-            failed_message_ids.append({"itemIdentifier": message_id})
+            return {"itemIdentifier": message_id}
+
+        return None
+
+    # Stream every message in the batch in parallel
+    # Each stream spends nearly all of its time waiting on Bedrock and AppSync,
+    # so threads let one invocation serve the whole batch concurrently
+    if len(records) > 1:
+        with ThreadPoolExecutor(
+            max_workers=min(len(records), _MAX_PARALLEL_STREAMS),
+            thread_name_prefix="stream",
+        ) as streams:
+            results = list(streams.map(process_record, records))
+    else:
+        results = [process_record(record) for record in records]
+
+    # Initialize tracking for failed messages
+    failed_message_ids = [result for result in results if result]
 
     # Return information about any failed messages that should be retried
     # SQS will retry these messages according to the queue configuration
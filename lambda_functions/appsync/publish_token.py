@@ -1,5 +1,13 @@
 """
-AWS AppSync GraphQL Resolver - Token Publication Handler
+AWS AppSync GraphQL Resolver - Token Publication Handler (reference only)
+
+NOTE: This function is not deployed. AppSyncStreamingStack resolves the
+publishToken and publishTokens mutations with a NONE data source and a
+JavaScript resolver, so publishing a token never invokes a Lambda function.
+Wiring this resolver in would add one Lambda invocation to every publish on
+the streaming hot path. It is kept as a reference for the resolver contract
+and for the optional persistence hooks below, which belong off the
+real-time path.
 
 This Lambda function serves as a GraphQL resolver for the 'publishToken' mutation in AppSync.
 It demonstrates the core mechanism of real-time subscriptions in GraphQL applications:
@@ -8,7 +16,7 @@ Key Concepts Demonstrated:
 1. GraphQL Subscriptions - Real-time data publishing to connected clients
 2. Mutation Resolvers - Processing and transforming data before publication
 3. Session-based Broadcasting - Targeting specific users/sessions
-4. Data Persistence - Optional storage for conversation history
+4. Data Persistence - Optional, batched storage for conversation history
 5. Real-time Pub/Sub - AppSync's built-in subscription infrastructure
 
 GraphQL Schema Integration:
@@ -48,9 +56,20 @@ Benefits of This Pattern:
 
 import json
 import datetime
+import logging
 import boto3
 import os
 
+# Per-call logs are emitted at DEBUG so the default INFO level keeps this
+# per-token resolver free of log writes; set LOG_LEVEL=DEBUG to trace tokens
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# Optional token history sink, created once per execution environment
+# Only initialized when a Firehose delivery stream is configured
+_TOKEN_HISTORY_STREAM = os.getenv("TOKEN_HISTORY_STREAM")
+_FIREHOSE = boto3.client("firehose") if _TOKEN_HISTORY_STREAM else None
+
 
 def lambda_handler(event, context):
     """
@@ -86,14 +105,18 @@ def lambda_handler(event, context):
     - This enables multiple concurrent AI conversations
     - Each session is isolated from others
 
+    Environment Variables:
+    - TOKEN_HISTORY_STREAM (optional): Firehose delivery stream for token history
+    - LOG_LEVEL (optional): DEBUG enables per-token logging (default INFO)
+
     Optional Features:
-    - Token persistence in DynamoDB for conversation history
+    - Token persistence via Firehose for conversation history
     - Token filtering/processing before publication
     - Rate limiting and validation
     - Custom metadata attachment
     """
 
-    print(f"📡 PUBLISHER: publishToken mutation received")
+    logger.debug("📡 PUBLISHER: publishToken mutation received")
 
     # Extract GraphQL arguments from AppSync event
     # These come from the worker Lambda's GraphQL mutation call
@@ -103,17 +126,20 @@ def lambda_handler(event, context):
     is_complete = arguments.get("isComplete", False)
 
     # Add timestamp for client-side ordering and debugging
-    timestamp = datetime.datetime.utcnow().isoformat()
+    # timezone-aware now() replaces the deprecated utcnow()
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
     # Log token publication for monitoring and debugging
-    # In production, consider structured logging for better observability
+    # Completion is logged at INFO; individual tokens only at DEBUG
     if is_complete:
         print(f"🏁 PUBLISHER: Stream completed for session {session_id}")
-    else:
+    elif logger.isEnabledFor(logging.DEBUG):
         # Truncate token for privacy and log size management
         token_preview = token[:50] + "..." if len(token) > 50 else token
-        print(
-            f"📤 PUBLISHER: Publishing token for session {session_id}: '{token_preview}'"
+        logger.debug(
+            "📤 PUBLISHER: Publishing token for session %s: '%s'",
+            session_id,
+            token_preview,
         )
 
     # Production Enhancement Opportunities:
@@ -152,35 +178,31 @@ def lambda_handler(event, context):
         "timestamp": timestamp,
     }
 
-    # Optional: Persist tokens in DynamoDB for conversation history
+    # Optional: Persist tokens for conversation history
     # This enables features like conversation replay, analytics, and audit trails
-    try:
-        # Example DynamoDB storage implementation
-        # Uncomment and configure if you want persistent conversation history
-        #
-        # dynamodb = boto3.resource('dynamodb')
-        # table = dynamodb.Table('StreamingTokens')  # Create this table in CDK
-        #
-        # # Store with composite key for efficient querying
-        # table.put_item(Item={
-        #     'session_id': session_id,
-        #     'sequence': int(timestamp.replace(':', '').replace('-', '').replace('.', '')),
-        #     'token': token,
-        #     'is_complete': is_complete,
-        #     'timestamp': timestamp,
-        #     'ttl': int(datetime.datetime.utcnow().timestamp()) + (7 * 24 * 60 * 60)  # 7 day TTL
-        # })
-        #
-        # print(f"💾 PUBLISHER: Token stored in DynamoDB for session {session_id}")
-        pass
-
-    except Exception as e:
-        # Log storage errors but don't fail the real-time publication
-        # Real-time streaming is more important than persistence
-        print(f"⚠️ PUBLISHER: Warning - Could not store token in DynamoDB: {e}")
+    #
+    # A synchronous DynamoDB put_item per token would put one database write
+    # on the real-time path of every token. Instead, tokens are handed to an
+    # Amazon Data Firehose delivery stream, which buffers and batches the
+    # records server-side (e.g. into S3) off the subscription path.
+    # Set TOKEN_HISTORY_STREAM to the delivery stream name to enable it.
+    if _FIREHOSE is not None:
+        try:
+            _FIREHOSE.put_record(
+                DeliveryStreamName=_TOKEN_HISTORY_STREAM,
+                Record={"Data": json.dumps(result).encode("utf-8") + b"\n"},
+            )
+            logger.debug(
+                "💾 PUBLISHER: Token queued for history, session %s", session_id
+            )
+
+        except Exception as e:
+            # Log storage errors but don't fail the real-time publication
+            # Real-time streaming is more important than persistence
+            print(f"⚠️ PUBLISHER: Warning - Could not queue token for history: {e}")
 
     # Return token data to AppSync
     # AppSync automatically publishes this to all clients subscribed to
     # onTokenReceived(sessionId: session_id)
-    print(f"✅ PUBLISHER: Token published successfully for session {session_id}")
+    logger.debug("✅ PUBLISHER: Token published for session %s", session_id)
     return result
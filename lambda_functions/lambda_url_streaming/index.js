@@ -6,14 +6,45 @@
  * 2. Cognito JWT Authentication - validates user tokens
  * 3. Bedrock AI Integration - streams responses from Claude AI model
  * 4. CORS handling for web applications
+ * 5. Prompt Caching - identical prompts are answered from DynamoDB
+ * 6. Response Compression - Brotli-compressed token stream when accepted
  */
 
 // AWS SDK v3 imports for Bedrock streaming functionality
 const { BedrockRuntimeClient, InvokeModelWithResponseStreamCommand } = require('@aws-sdk/client-bedrock-runtime');
 
+// DynamoDB client for the prompt cache (AWS SDK v3 ships with the Node.js runtime)
+const { DynamoDBClient, GetItemCommand, PutItemCommand } = require('@aws-sdk/client-dynamodb');
+const { createHash } = require('crypto');
+
+// Node.js built-ins for the compressed response stream
+const zlib = require('zlib');
+const { finished } = require('stream/promises');
+
 // AWS official JWT verification library for Cognito tokens
 const { CognitoJwtVerifier } = require('aws-jwt-verify');
 
+// Bedrock model used for every request (also part of the prompt cache key)
+const MODEL_ID = 'anthropic.claude-3-5-sonnet-20240620-v1:0';
+
+/**
+ * Prompt Cache Configuration
+ *
+ * Identical prompts (greetings, common questions) would otherwise spend
+ * Bedrock tokens and seconds of generation time on every request. Complete
+ * responses are stored in a DynamoDB table keyed by sha256(user + model +
+ * prompt) and expire through DynamoDB TTL, so a prompt the same user repeats
+ * is answered with a single GetItem. The caller's Cognito sub is part of the
+ * key, so one user is never served another user's generation.
+ *
+ * The cache is opt-in: it is disabled when PROMPT_CACHE_TABLE is not set.
+ */
+const PROMPT_CACHE_TABLE = process.env.PROMPT_CACHE_TABLE;
+const PROMPT_CACHE_TTL_SECONDS = Number(process.env.PROMPT_CACHE_TTL_SECONDS || 86400);
+
+// Created once per execution environment and reused by warm invocations
+const dynamoClient = PROMPT_CACHE_TABLE ? new DynamoDBClient({ region: process.env.AWS_REGION }) : null;
+
 /**
  * Cognito JWT Verifier Configuration
  * 
@@ -51,6 +82,31 @@ const jwtVerifier = CognitoJwtVerifier.create({
   clientId: process.env.USER_POOL_CLIENT_ID,
 });
 
+/**
+ * JWKS Pre-fetch on Cold Start
+ *
+ * The verifier caches the user pool's JWKS (and the imported public keys) at
+ * module scope, so warm invocations verify tokens locally without any HTTPS
+ * call. hydrate() starts that download during the init phase instead of on
+ * the first request; verify() joins the in-flight fetch if a request arrives
+ * before it finishes. A failed pre-fetch is retried by the first verify().
+ */
+jwtVerifier.hydrate().catch((error) => {
+  console.error('JWKS pre-fetch failed:', error);
+});
+
+/**
+ * Verified Token Cache
+ *
+ * Maps a complete token string to its verified payload. Keying on the whole
+ * token (not just a claim or the signature) means any modified token misses
+ * the cache and goes through full verification. Entries live for at most
+ * TOKEN_CACHE_TTL_MS and never outlive the token's exp claim.
+ */
+const TOKEN_CACHE_TTL_MS = 60_000;
+const TOKEN_CACHE_MAX_ENTRIES = 1000;
+const verifiedTokens = new Map();
+
 /**
  * JWT Token Validation Function
  * 
@@ -72,14 +128,37 @@ const jwtVerifier = CognitoJwtVerifier.create({
  * - cognito:username: Username in Cognito
  * - custom attributes: Any custom user data
  * 
+ * Verified tokens are remembered for up to 60 seconds (never past their own
+ * expiry), so a client that sends several prompts with the same token pays
+ * for the RS256 signature check once; see verifiedTokens below.
+ *
  * @param {string} token - The JWT ID token to validate
  * @returns {Promise} - Resolves with decoded token payload or rejects with error
  */
 async function validateToken(token) {
+  // Fast path: this exact token was verified recently
+  const cached = verifiedTokens.get(token);
+  if (cached) {
+    if (cached.expiresAt > Date.now()) {
+      return cached.payload;
+    }
+    verifiedTokens.delete(token);
+  }
+
   try {
     // The verify method returns the decoded token payload if valid
     // For ID tokens, this includes user identity information
     const payload = await jwtVerifier.verify(token);
+
+    // Remember the result; the oldest entry is evicted once the cache is full
+    // (a Map iterates in insertion order)
+    if (verifiedTokens.size >= TOKEN_CACHE_MAX_ENTRIES) {
+      verifiedTokens.delete(verifiedTokens.keys().next().value);
+    }
+    verifiedTokens.set(token, {
+      payload,
+      expiresAt: Math.min(Date.now() + TOKEN_CACHE_TTL_MS, payload.exp * 1000),
+    });
     
     // Optional: Log user information for debugging (remove in production)
     console.log(`Authenticated user: ${payload.sub} (${payload.email || payload['cognito:username']})`);
@@ -92,6 +171,96 @@ async function validateToken(token) {
   }
 }
 
+/**
+ * Prompt Cache Helpers
+ *
+ * Both helpers are best-effort: a cache failure is logged and the request
+ * falls through to Bedrock, so the cache can never break streaming.
+ *
+ * @param {string} promptHash - sha256 of the user, model ID and prompt
+ */
+async function getCachedResponse(promptHash) {
+  try {
+    const result = await dynamoClient.send(new GetItemCommand({
+      TableName: PROMPT_CACHE_TABLE,
+      Key: { promptHash: { S: promptHash } },
+      ProjectionExpression: '#response, expiresAt',
+      ExpressionAttributeNames: { '#response': 'response' },
+    }));
+    // TTL deletion is asynchronous, so expired items can still be returned
+    const item = result.Item;
+    if (item && Number(item.expiresAt.N) > Date.now() / 1000) {
+      return item.response.S;
+    }
+  } catch (error) {
+    console.error('Prompt cache read failed:', error);
+  }
+  return null;
+}
+
+async function putCachedResponse(promptHash, response) {
+  try {
+    await dynamoClient.send(new PutItemCommand({
+      TableName: PROMPT_CACHE_TABLE,
+      Item: {
+        promptHash: { S: promptHash },
+        response: { S: response },
+        expiresAt: { N: String(Math.floor(Date.now() / 1000) + PROMPT_CACHE_TTL_SECONDS) },
+      },
+    }));
+  } catch (error) {
+    console.error('Prompt cache write failed:', error);
+  }
+}
+
+/**
+ * Open the HTTP Response Stream
+ *
+ * LLM output is plain text and compresses several times over, so when the
+ * client accepts Brotli (browsers send "br" on every HTTPS request) the
+ * stream is compressed with a fast, text-tuned Brotli encoder. Every write is
+ * flushed as its own Brotli block, so each token still reaches the client as
+ * soon as it is generated; browsers decode the stream incrementally.
+ *
+ * @param {object} responseStream - The raw Lambda response stream
+ * @param {object} event - Function URL event (for the Accept-Encoding header)
+ * @param {object} headers - Response headers
+ * @returns {{write: function(string), end: function(): Promise}} Text output
+ */
+function openTextStream(responseStream, event, headers) {
+  const acceptEncoding = event.headers['accept-encoding'] || '';
+
+  if (!/\bbr\b/.test(acceptEncoding)) {
+    const stream = awslambda.HttpResponseStream.from(responseStream, { statusCode: 200, headers });
+    return {
+      write: (text) => stream.write(text),
+      end: () => new Promise((resolve) => stream.end(resolve)),
+    };
+  }
+
+  const stream = awslambda.HttpResponseStream.from(responseStream, {
+    statusCode: 200,
+    headers: { ...headers, 'Content-Encoding': 'br', 'Vary': 'Accept-Encoding' },
+  });
+  const compressor = zlib.createBrotliCompress({
+    params: {
+      [zlib.constants.BROTLI_PARAM_QUALITY]: 4,
+      [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+    },
+  });
+  compressor.pipe(stream);
+  return {
+    write: (text) => {
+      compressor.write(text);
+      compressor.flush(zlib.constants.BROTLI_OPERATION_FLUSH);
+    },
+    end: () => {
+      compressor.end();
+      return finished(stream);
+    },
+  };
+}
+
 /**
  * Main Lambda Handler with Response Streaming
  * 
@@ -106,6 +275,8 @@ async function validateToken(token) {
  * - Bedrock AI model streaming integration
  */
 exports.handler = awslambda.streamifyResponse(async (event, responseStream, context) => {
+  // Text output, once the 200 response headers have been sent
+  let output = null;
   try {
     /**
      * CORS Preflight Request Handling
@@ -164,6 +335,29 @@ exports.handler = awslambda.streamifyResponse(async (event, responseStream, cont
     const body = JSON.parse(event.body || '{}');
     const prompt = body.prompt || 'Hello, how are you?';
 
+    /**
+     * Prompt Cache Lookup
+     *
+     * A cache hit streams the stored response and returns without calling
+     * Bedrock. The X-Cache header tells clients which path served them.
+     * Entries are per user: the key includes the caller's Cognito sub.
+     */
+    const promptHash = dynamoClient
+      ? createHash('sha256').update(`${userInfo.sub}\n${MODEL_ID}\n${prompt}`).digest('hex')
+      : null;
+    const cachedResponse = promptHash ? await getCachedResponse(promptHash) : null;
+    // An empty cached response is treated as a miss, never replayed
+    if (cachedResponse) {
+      output = openTextStream(responseStream, event, {
+        'Content-Type': 'text/plain',
+        'Cache-Control': 'no-cache',
+        'X-Cache': 'HIT'
+      });
+      output.write(cachedResponse);
+      await output.end();
+      return;
+    }
+
     /**
      * Bedrock Client Setup
      * 
@@ -185,7 +379,7 @@ exports.handler = awslambda.streamifyResponse(async (event, responseStream, cont
      * - messages: Array of conversation messages (user/assistant format)
      */
     const command = new InvokeModelWithResponseStreamCommand({
-      modelId: 'anthropic.claude-3-5-sonnet-20240620-v1:0',
+      modelId: MODEL_ID,
       body: JSON.stringify({
         anthropic_version: 'bedrock-2023-05-31',
         max_tokens: 1000,
@@ -205,18 +399,14 @@ exports.handler = awslambda.streamifyResponse(async (event, responseStream, cont
      * - Content-Type: text/plain for streaming text data
      * - Cache-Control: no-cache prevents caching of streaming responses
      * - Connection: keep-alive maintains the connection for streaming
+     * - Content-Encoding: br when the client accepts Brotli (see openTextStream)
      */
-    const metadata = {
-      statusCode: 200,
-      headers: {
-        'Content-Type': 'text/plain',
-        'Cache-Control': 'no-cache',
-        'Connection': 'keep-alive'
-      }
-    };
-    
-    // Transform the responseStream into an HTTP response stream with metadata
-    responseStream = awslambda.HttpResponseStream.from(responseStream, metadata);
+    output = openTextStream(responseStream, event, {
+      'Content-Type': 'text/plain',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive',
+      'X-Cache': 'MISS'
+    });
     console.log("response", response);
 
     /**
@@ -232,7 +422,9 @@ exports.handler = awslambda.streamifyResponse(async (event, responseStream, cont
      * 3. Decode the binary data to JSON
      * 4. Filter for text content chunks
      * 5. Stream text immediately to client
+     * 6. Keep the text for the prompt cache
      */
+    const responseChunks = [];
     for await (const chunk of response.body) {
       console.log("chunk", chunk);
       if (chunk.chunk) {
@@ -244,13 +436,22 @@ exports.handler = awslambda.streamifyResponse(async (event, responseStream, cont
         if (chunkData.type === 'content_block_delta') {
           console.log("chunkData.delta.text", chunkData.delta.text);
           // Stream the text chunk immediately to the client
-          responseStream.write(chunkData.delta.text);
+          output.write(chunkData.delta.text);
+          responseChunks.push(chunkData.delta.text);
         }
       }
     }
     
     // Close the response stream to signal completion
-    responseStream.end();
+    await output.end();
+
+    // Store the complete response after the client already has it, so the
+    // cache write never delays the stream; failed streams and empty
+    // responses are never cached
+    const completeResponse = responseChunks.join('');
+    if (promptHash && completeResponse) {
+      await putCachedResponse(promptHash, completeResponse);
+    }
     
   } catch (error) {
     /**
@@ -272,7 +473,14 @@ exports.handler = awslambda.streamifyResponse(async (event, responseStream, cont
       },
       body: JSON.stringify({ error: error.message })
     };
-    responseStream.write(JSON.stringify(errorResponse));
-    responseStream.end();
+    // Once streaming has started, the error goes through the same
+    // (possibly compressed) output so the client can still decode it
+    if (output) {
+      output.write(JSON.stringify(errorResponse));
+      await output.end();
+    } else {
+      responseStream.write(JSON.stringify(errorResponse));
+      responseStream.end();
+    }
   }
 }); 
\ No newline at end of file
@@ -21,11 +21,173 @@ Client → wss://api-id.execute-api.region.amazonaws.com/stage?token=JWT_TOKEN
    Connection established/rejected
 """
 
+import base64
+import functools
+import hashlib
 import json
 import jwt
-from jwt import PyJWKClient
+import logging
+import time
+import urllib.request
+from cachetools import TLRUCache
+from jwt.algorithms import RSAAlgorithm
 import os
 
+# Cognito configuration, resolved once per execution environment
+# The region comes from the Lambda runtime environment instead of being parsed
+# out of the invoked function ARN on every request. The expected issuer is
+# built once here and reused by every token verification.
+_REGION = os.environ.get("AWS_REGION") or os.environ["AWS_DEFAULT_REGION"]
+_USER_POOL_ID = os.environ["USER_POOL_ID"]
+_ISSUER = f"https://cognito-idp.{_REGION}.amazonaws.com/{_USER_POOL_ID}"
+_JWKS_URL = f"{_ISSUER}/.well-known/jwks.json"
+
+# Optional JWKS document bundled with the function code at deploy time
+# (lambda_functions/websocket_api/jwks_bundle.json, see README). When present
+# the signing keys are loaded from disk during INIT with no network call.
+_JWKS_BUNDLE_PATH = os.getenv("JWKS_BUNDLE_PATH")
+
+# Logging
+# The standard logging module formats arguments only when the level is
+# enabled, so set LOG_LEVEL=DEBUG for verbose output (default INFO)
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# Cognito signing keys, indexed by key ID (kid)
+# The JWKS document is downloaded once per container and every JWK is
+# converted to a cryptography RSA public key up front, so verifying a token is
+# a dictionary lookup plus the OpenSSL-backed signature check. No JWKS parsing
+# or key construction happens per request.
+_KEYS_BY_KID = {}
+
+# An unknown kid triggers a refresh (Cognito rotated its keys), but at most
+# once per interval so tokens with made-up kids cannot hammer the endpoint
+_JWKS_REFRESH_INTERVAL_SECONDS = 60
+_last_jwks_fetch = None
+
+
+# Verified token cache
+# Clients often reconnect with the same token (network drops, idle timeouts,
+# mobile network handoffs). Remembering verified tokens skips the RSA
+# signature check and claim validation on those reconnects. Entries are keyed
+# by a BLAKE2b digest rather than the raw token, which bounds key size and
+# keeps raw bearer tokens out of the cache. Only the full token maps to an
+# entry, so sharing the cache between users' connections is safe.
+#
+# Each entry lives until shortly before its token's own exp claim (a
+# signature cannot become invalid earlier), so a token is verified once per
+# execution environment. When the cache is full, the entries closest to
+# expiry are evicted first.
+_EXPIRY_MARGIN_SECONDS = 5  # Tokens this close to expiry are verified again
+_TOKEN_CACHE = TLRUCache(
+    maxsize=4096,
+    ttu=lambda _key, value, _now: value[1] - _EXPIRY_MARGIN_SECONDS,
+    timer=time.time,  # exp is a Unix timestamp
+)
+
+# Signing algorithms accepted in the token header (Cognito signs with RS256)
+# Rejecting anything else up front also blocks "alg": "none" tokens
+_ALLOWED_ALGORITHMS = ("RS256",)
+
+# Prebuilt policy documents
+# With API_ARN set (the $connect route ARN, from the stack) every policy
+# covers the same resource, so the Allow and Deny documents are built once
+# here and shared by all responses; only the principalId differs per user.
+# Without it, documents are built per request from the methodArn.
+_API_ARN = os.getenv("API_ARN")
+_POLICY_DOCUMENTS = (
+    {
+        effect: {
+            "Version": "2012-10-17",
+            "Statement": [
+                {"Action": "execute-api:Invoke", "Effect": effect, "Resource": _API_ARN}
+            ],
+        }
+        for effect in ("Allow", "Deny")
+    }
+    if _API_ARN
+    else {}
+)
+
+
+def _index_signing_keys(jwks):
+    """Rebuild the kid -> RSA public key map from a JWKS document"""
+    keys = {
+        jwk["kid"]: RSAAlgorithm.from_jwk(jwk)
+        for jwk in jwks.get("keys", [])
+        if jwk.get("kty") == "RSA" and "kid" in jwk
+    }
+    _KEYS_BY_KID.clear()
+    _KEYS_BY_KID.update(keys)
+
+
+def _load_signing_keys():
+    """Download the Cognito JWKS and rebuild the kid -> RSA public key map"""
+    global _last_jwks_fetch
+    _last_jwks_fetch = time.monotonic()
+
+    with urllib.request.urlopen(_JWKS_URL, timeout=5) as response:
+        _index_signing_keys(json.loads(response.read()))
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_header(segment):
+    """
+    Decode the base64url header segment of a JWT into (alg, kid)
+
+    Every token signed with the same Cognito key has a byte-identical header
+    segment, so results are memoized: after the first token per key, the
+    header check is a dictionary lookup with no base64 or JSON decoding.
+    Invalid segments raise and are therefore never cached.
+    """
+    try:
+        padded = segment + "=" * (-len(segment) % 4)
+        header = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError as e:
+        raise jwt.DecodeError(f"Invalid header: {e}") from None
+    if not isinstance(header, dict):
+        raise jwt.DecodeError("Invalid header: not a JSON object")
+    return header.get("alg"), header.get("kid")
+
+
+def _get_signing_key(kid):
+    """Return the RSA public key for a kid, refreshing the JWKS on a miss"""
+    key = _KEYS_BY_KID.get(kid)
+    if key is None and (
+        _last_jwks_fetch is None
+        or time.monotonic() - _last_jwks_fetch > _JWKS_REFRESH_INTERVAL_SECONDS
+    ):
+        _load_signing_keys()
+        key = _KEYS_BY_KID.get(kid)
+    if key is None:
+        raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+    return key
+
+
+# Warm the signing keys during the INIT phase
+# Module code runs once when the execution environment starts (ahead of any
+# request with provisioned concurrency), so the JWKS download and RSA key
+# construction are paid there instead of on the first $connect.
+#
+# A bundled JWKS file removes the HTTPS round trip from INIT entirely. It may
+# be stale after a key rotation: a token with an unknown kid still triggers a
+# download, and _last_jwks_fetch stays None so that first refresh is not
+# rate limited. Without a bundle (or if it is unreadable) the keys are
+# downloaded here, and if that fails, on the first request as before.
+try:
+    if _JWKS_BUNDLE_PATH:
+        with open(_JWKS_BUNDLE_PATH, "rb") as bundle:
+            _index_signing_keys(json.load(bundle))
+except Exception as e:
+    logger.warning("Bundled JWKS unusable, downloading instead: %s", e)
+
+if not _KEYS_BY_KID:
+    try:
+        _load_signing_keys()
+    except Exception as e:
+        _last_jwks_fetch = None
+        logger.warning("JWKS prefetch failed, deferring to first request: %s", e)
+
 
 def lambda_handler(event, context):
     """
@@ -54,18 +216,32 @@ def lambda_handler(event, context):
     try:
         # Extract JWT token from query string parameters
         # WebSocket clients connect with: wss://api-url/stage?token=JWT_TOKEN
-        token = event.get("queryStringParameters", {}).get("token")
+        token = (event.get("queryStringParameters") or {}).get("token")
         if not token:
-            print("No token provided in query parameters")
+            logger.info("No token provided in query parameters")
             return generate_policy("user", "Deny", event["methodArn"])
 
-        # Construct Cognito JWKS URL for token verification
-        # JWKS (JSON Web Key Set) contains the public keys used to verify JWT signatures
-        user_pool_id = os.environ["USER_POOL_ID"]
-        region = context.invoked_function_arn.split(":")[
-            3
-        ]  # Extract region from Lambda ARN
-        jwks_url = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
+        # Reuse an earlier verification of the same token; expired entries
+        # are never returned by the cache
+        cache_key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+        cached = _TOKEN_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info("Authorization successful for user (cached): %s", cached[0])
+            return generate_policy(cached[0], "Allow", event["methodArn"])
+
+        # Cheap structural checks before any key lookup or JWKS download
+        # Malformed tokens (wrong segment count, undecodable header, missing
+        # kid, unexpected algorithm) are denied without touching the network,
+        # so garbage connection attempts cannot drive JWKS requests
+        if token.count(".") != 2:
+            logger.warning("Authorization failed: Malformed token")
+            return generate_policy("user", "Deny", event["methodArn"])
+        alg, kid = _parse_header(token[: token.index(".")])
+        if alg not in _ALLOWED_ALGORITHMS or not kid:
+            logger.warning(
+                "Authorization failed: Unexpected token header alg=%s kid=%s", alg, kid
+            )
+            return generate_policy("user", "Deny", event["methodArn"])
 
         # Verify JWT token using Cognito's public keys
         # This process validates:
@@ -73,30 +249,34 @@ def lambda_handler(event, context):
         # 2. Token expiration (exp claim)
         # 3. Token issuer (iss claim)
         # 4. Token format and structure
-        jwks_client = PyJWKClient(jwks_url)
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        # JWKS (JSON Web Key Set) contains the public keys used to verify JWT
+        # signatures; the token header's kid selects the pre-parsed key
+        signing_key = _get_signing_key(kid)
 
         decoded_token = jwt.decode(
             token,
-            signing_key.key,
-            algorithms=["RS256"],  # Cognito uses RS256 algorithm
+            signing_key,
+            algorithms=list(_ALLOWED_ALGORITHMS),  # Cognito uses RS256 algorithm
             options={"verify_aud": False},  # Skip audience verification for simplicity
-            issuer=f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}",
+            issuer=_ISSUER,
         )
 
+        # Remember the verified identity for quick reconnects
+        _TOKEN_CACHE[cache_key] = (decoded_token["sub"], decoded_token["exp"])
+
         # Token is valid - generate Allow policy using user's unique identifier
         # The principalId (user's 'sub' claim) will be available in subsequent Lambda invocations
-        print(f"Authorization successful for user: {decoded_token['sub']}")
+        logger.info("Authorization successful for user: %s", decoded_token["sub"])
         return generate_policy(decoded_token["sub"], "Allow", event["methodArn"])
 
     except jwt.ExpiredSignatureError:
-        print("Authorization failed: Token has expired")
+        logger.warning("Authorization failed: Token has expired")
         return generate_policy("user", "Deny", event["methodArn"])
     except jwt.InvalidTokenError as e:
-        print(f"Authorization failed: Invalid token - {str(e)}")
+        logger.warning("Authorization failed: Invalid token - %s", e)
         return generate_policy("user", "Deny", event["methodArn"])
     except Exception as e:
-        print(f"Authorization failed: {str(e)}")
+        logger.warning("Authorization failed: %s", e)
         return generate_policy("user", "Deny", event["methodArn"])
 
 
@@ -136,12 +316,12 @@ def generate_policy(principal_id, effect, resource):
     - Deny: Connection is immediately rejected with 403 Forbidden
     - The policy applies to the entire WebSocket session lifecycle
     """
-    return {
-        "principalId": principal_id,
-        "policyDocument": {
+    document = _POLICY_DOCUMENTS.get(effect)
+    if document is None:
+        document = {
             "Version": "2012-10-17",
             "Statement": [
                 {"Action": "execute-api:Invoke", "Effect": effect, "Resource": resource}
             ],
-        },
-    }
+        }
+    return {"principalId": principal_id, "policyDocument": document}
@@ -20,7 +20,14 @@ Key Concepts:
 - Connection Context: Information about the connection is available throughout the session
 """
 
-import json
+import logging
+import os
+
+# Logging
+# The standard logging module formats arguments only when the level is
+# enabled, so set LOG_LEVEL=DEBUG for verbose output (default INFO)
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
 
 def lambda_handler(event, context):
@@ -57,20 +64,29 @@ def lambda_handler(event, context):
     """
 
     # Extract connection information from the event
-    connection_id = event["requestContext"]["connectionId"]
-    stage = event["requestContext"]["stage"]
-    domain_name = event["requestContext"]["domainName"]
+    request_context = event["requestContext"]
+    connection_id = request_context["connectionId"]
+    stage = request_context["stage"]
+    domain_name = request_context["domainName"]
 
     # Get user identity from the authorizer (if authorization was successful)
     # This comes from the principalId returned by the Lambda authorizer
-    principal_id = event["requestContext"].get("identity", {}).get("principalId")
+    principal_id = (request_context.get("identity") or {}).get("principalId")
 
     # Log successful connection for monitoring and debugging
-    print(f"WebSocket connection established:")
-    print(f"  Connection ID: {connection_id}")
-    print(f"  User Principal: {principal_id}")
-    print(f"  Endpoint: wss://{domain_name}/{stage}")
-    print(f"  Connected at: {event['requestContext'].get('connectedAt')}")
+    # (one multi-line message is a single log write instead of five)
+    logger.info(
+        "WebSocket connection established:\n"
+        "  Connection ID: %s\n"
+        "  User Principal: %s\n"
+        "  Endpoint: wss://%s/%s\n"
+        "  Connected at: %s",
+        connection_id,
+        principal_id,
+        domain_name,
+        stage,
+        request_context.get("connectedAt"),
+    )
 
     # Optional: Store connection information in DynamoDB for session management
     # This would enable features like:
@@ -91,13 +107,6 @@ def lambda_handler(event, context):
 
     # Return success response to complete the connection
     # Any non-200 status code will cause the connection to be rejected
-    return {
-        "statusCode": 200,
-        "body": json.dumps(
-            {
-                "message": "Connected successfully",
-                "connectionId": connection_id,
-                "timestamp": event["requestContext"].get("connectedAt"),
-            }
-        ),
-    }
+    # API Gateway ignores the response body on $connect/$disconnect, so
+    # only the status code is returned
+    return {"statusCode": 200}
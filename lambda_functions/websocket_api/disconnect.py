@@ -20,7 +20,14 @@ Key Concepts:
 - Connection State: Connection ID is still available for final operations
 """
 
-import json
+import logging
+import os
+
+# Logging
+# The standard logging module formats arguments only when the level is
+# enabled, so set LOG_LEVEL=DEBUG for verbose output (default INFO)
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
 
 def lambda_handler(event, context):
@@ -57,19 +64,28 @@ def lambda_handler(event, context):
     """
 
     # Extract connection information from the event
-    connection_id = event["requestContext"]["connectionId"]
-    stage = event["requestContext"]["stage"]
-    domain_name = event["requestContext"]["domainName"]
+    request_context = event["requestContext"]
+    connection_id = request_context["connectionId"]
+    stage = request_context["stage"]
+    domain_name = request_context["domainName"]
 
     # Get user identity (preserved from original authorization)
-    principal_id = event["requestContext"].get("identity", {}).get("principalId")
+    principal_id = (request_context.get("identity") or {}).get("principalId")
 
     # Log disconnection for monitoring and debugging
-    print(f"WebSocket connection closed:")
-    print(f"  Connection ID: {connection_id}")
-    print(f"  User Principal: {principal_id}")
-    print(f"  Endpoint: wss://{domain_name}/{stage}")
-    print(f"  Disconnected at: {event['requestContext'].get('disconnectedAt')}")
+    # (one multi-line message is a single log write instead of five)
+    logger.info(
+        "WebSocket connection closed:\n"
+        "  Connection ID: %s\n"
+        "  User Principal: %s\n"
+        "  Endpoint: wss://%s/%s\n"
+        "  Disconnected at: %s",
+        connection_id,
+        principal_id,
+        domain_name,
+        stage,
+        request_context.get("disconnectedAt"),
+    )
 
     # Optional: Clean up connection state from DynamoDB
     # Remove the connection record that was created in $connect
@@ -80,9 +96,9 @@ def lambda_handler(event, context):
     #     dynamodb = boto3.resource('dynamodb')
     #     table = dynamodb.Table('WebSocketConnections')
     #     table.delete_item(Key={'connection_id': connection_id})
-    #     print(f"Cleaned up connection record for {connection_id}")
+    #     logger.info("Cleaned up connection record for %s", connection_id)
     # except Exception as e:
-    #     print(f"Error cleaning up connection record: {str(e)}")
+    #     logger.warning("Error cleaning up connection record: %s", e)
     #     # Log error but don't fail the disconnect process
 
     # Optional: Update user presence status
@@ -96,13 +112,6 @@ def lambda_handler(event, context):
     # Return success response
     # Disconnect handlers should always return 200 to indicate successful cleanup
     # Even if cleanup operations fail, the connection will still be closed
-    return {
-        "statusCode": 200,
-        "body": json.dumps(
-            {
-                "message": "Disconnected successfully",
-                "connectionId": connection_id,
-                "timestamp": event["requestContext"].get("disconnectedAt"),
-            }
-        ),
-    }
+    # API Gateway ignores the response body on $connect/$disconnect, so
+    # only the status code is returned
+    return {"statusCode": 200}
@@ -0,0 +1,85 @@
+"""
+WebSocket API "stream" Route Handler for Queued Mode
+
+In queued mode (`cdk deploy -c websocket_stream_queue=true`) the "stream"
+route is served by this function instead of stream.lambda_handler. It only
+validates the client's message and enqueues it to SQS; the stream worker
+(stream.queue_handler, triggered by the queue) then invokes Bedrock and
+posts the tokens to the connection.
+
+Key Concepts:
+- Fast Route Response: The route integration returns within milliseconds,
+  whatever the length of the AI response
+- Buffered Bursts: Requests wait in the queue instead of being throttled,
+  and the queue's event source caps the number of concurrent Bedrock streams
+- Thin Function: Standard library and botocore only (no dependency layer),
+  so cold starts stay short at a small memory size
+
+Queue Message Format (read by stream.queue_handler):
+{"connectionId": "...", "domainName": "...", "stage": "prod",
+ "principalId": "...", "prompt": "...", "maxTokens": 1000}
+"""
+
+import json
+import logging
+import os
+
+import botocore.session
+from botocore.config import Config
+
+# SQS client, created once per execution environment
+# A plain botocore session avoids importing boto3's resource layer
+_REGION = os.environ.get("AWS_REGION") or os.environ["AWS_DEFAULT_REGION"]
+_STREAM_QUEUE_URL = os.environ["STREAM_QUEUE_URL"]
+_SQS = botocore.session.get_session().create_client(
+    "sqs",
+    region_name=_REGION,
+    config=Config(tcp_keepalive=True, retries={"mode": "standard"}),
+)
+
+# Logging
+# The standard logging module formats arguments only when the level is
+# enabled, so set LOG_LEVEL=DEBUG for verbose output (default INFO)
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+
+def lambda_handler(event, context):
+    """
+    Validate a "stream" route message and enqueue it for the stream worker
+
+    Accepts the same client message as stream.lambda_handler:
+    {"action": "stream", "prompt": "...", "options": {"max_tokens": 1000}}
+
+    Returns:
+        dict: 200 once enqueued, 400 for a body that is not valid JSON
+    """
+    request_context = event["requestContext"]
+    principal_id = (request_context.get("identity") or {}).get("principalId")
+
+    # API Gateway sends "body": null for an empty message
+    try:
+        body = json.loads(event.get("body") or "{}")
+    except json.JSONDecodeError as e:
+        logger.warning("Invalid JSON in request body: %s", e)
+        return {"statusCode": 400, "body": json.dumps({"error": "Invalid JSON"})}
+
+    _SQS.send_message(
+        QueueUrl=_STREAM_QUEUE_URL,
+        MessageBody=json.dumps(
+            {
+                "connectionId": request_context["connectionId"],
+                "domainName": request_context["domainName"],
+                "stage": request_context["stage"],
+                "principalId": principal_id,
+                "prompt": body.get("prompt", "Hello, how are you?"),
+                "maxTokens": (body.get("options") or {}).get("max_tokens", 1000),
+            }
+        ),
+    )
+    logger.info(
+        "Queued streaming request for connection %s (user %s)",
+        request_context["connectionId"],
+        principal_id,
+    )
+    return {"statusCode": 200}
@@ -0,0 +1,47 @@
+"""
+WebSocket API Connection Lifecycle Dispatcher
+
+One Lambda function serves every connection lifecycle event of the WebSocket
+API: the Lambda authorizer, the $connect route and the $disconnect route. The
+handlers themselves stay in authorizer.py, connect.py and disconnect.py; this
+module only routes each event to the right one.
+
+Key Concepts:
+1. Shared Execution Environments - $connect always follows a successful
+   authorizer call, so with one function it lands on an environment that is
+   already warm instead of paying a second cold start
+2. Shared Init State - Cognito signing keys and the verified-token cache are
+   loaded once and serve every lifecycle event in the environment
+3. Event Shape Dispatch - Authorizer events carry a methodArn; route events
+   carry requestContext.eventType (CONNECT / DISCONNECT)
+
+The "stream" route keeps its own function: it needs a much longer timeout,
+more memory and different dependencies.
+"""
+
+import authorizer
+import connect
+import disconnect
+
+# Route handlers by requestContext.eventType
+_ROUTE_HANDLERS = {
+    "CONNECT": connect.lambda_handler,
+    "DISCONNECT": disconnect.lambda_handler,
+}
+
+
+def lambda_handler(event, context):
+    """
+    Dispatch a WebSocket lifecycle event to its handler
+
+    Event Shapes:
+    - Authorizer: {"type": "REQUEST", "methodArn": "...", ...}
+    - $connect: {"requestContext": {"eventType": "CONNECT", ...}, ...}
+    - $disconnect: {"requestContext": {"eventType": "DISCONNECT", ...}, ...}
+
+    Returns:
+        dict: The IAM policy (authorizer) or HTTP-style response (routes)
+    """
+    if "methodArn" in event:
+        return authorizer.lambda_handler(event, context)
+    return _ROUTE_HANDLERS[event["requestContext"]["eventType"]](event, context)
@@ -21,11 +21,32 @@ Client → {"action": "stream", "prompt": "Hello, how are you?"}
          ↓
       Tokens forwarded to client in real-time
          ↓
-      {"type": "token", "token": "Hello"}
-      {"type": "token", "token": "! I'm"}
-      {"type": "token", "token": " doing"}
+      {"type": "tokens", "tokens": ["Hello", "! I'm", " doing"], "sequence": 1}
+      {"type": "tokens", "tokens": [" well", ", thanks"], "sequence": 2}
       {"type": "complete"}
 
+Token Batching:
+Every post_to_connection call is a separate HTTPS request to API Gateway, so
+sending each Bedrock delta on its own turns a 500-token answer into ~500
+round trips. Adjacent deltas are instead buffered and sent together in one
+"tokens" message once the buffer holds 64 tokens or 2 KB of text, or 50 ms
+have passed since the last send (see _TokenBatcher). The client concatenates
+the tokens of each message in sequence order.
+
+Overlapping I/O:
+Batches are posted by a single background thread, so the handler keeps
+reading the next Bedrock chunks while the previous post_to_connection call
+is in flight. One worker keeps the messages in order; all posts are awaited
+before the completion message is sent.
+
+Queued Mode (optional):
+The "stream" route can instead be served by enqueue.py, which only
+validates the message and enqueues it to SQS, so the route returns
+immediately. This module's queue_handler (triggered by the queue) then
+streams the Bedrock response to the connection. The number of concurrent Bedrock
+streams is capped on the queue's event source, and bursts of requests wait
+in the queue instead of being throttled.
+
 Architecture Benefits:
 - Real-time Response: Users see AI responses as they're generated
 - Scalable: WebSocket connections handle multiple concurrent users
@@ -33,9 +54,353 @@ Architecture Benefits:
 - Efficient: No polling required, true push-based communication
 """
 
+import base64
+import datetime
+import gzip
+import hashlib
+import hmac
 import json
-import boto3
-from botocore.exceptions import ClientError
+import logging
+import os
+import re
+import socket
+import threading
+import time
+import orjson
+import urllib3
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import quote
+import botocore.session
+from botocore.config import Config
+
+# AWS clients and credentials, created once per execution environment
+#
+# Creating AWS SDK clients costs endpoint resolution, credential lookup and a new
+# connection pool. Building them at module scope pays that once per container,
+# and warm invocations reuse the clients together with their open TCP/TLS
+# connections to Bedrock and API Gateway.
+# Refreshable (STS) credentials rotate themselves internally, so reading
+# frozen credentials per request always returns a valid key pair.
+# - TCP keep-alive keeps idle pooled connections healthy between invocations
+# - A larger pool avoids waiting for a free connection under load
+# - Standard retry mode retries throttling errors with jittered backoff
+# The client is created from a plain botocore session: boto3 only adds its
+# resource layer on top, which this function never uses but would import on
+# every cold start.
+_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={"mode": "standard"},
+)
+_REGION = os.environ.get("AWS_REGION") or os.environ["AWS_DEFAULT_REGION"]
+_SESSION = botocore.session.get_session()
+_CREDENTIALS = _SESSION.get_credentials()
+_BEDROCK = _SESSION.create_client(
+    "bedrock-runtime", region_name=_REGION, config=_CLIENT_CONFIG
+)
+
+# Pooled HTTP client for the API Gateway Management API (@connections)
+#
+# Messages are sent with a plain signed HTTPS POST instead of the boto3
+# apigatewaymanagementapi client. boto3 re-runs its full request pipeline
+# (parameter validation, serialization, event hooks) and derives a fresh SigV4
+# signing key for every call; on the per-batch streaming path only the
+# signature itself needs to be computed. The PoolManager keeps the HTTPS
+# connection to each WebSocket endpoint alive across calls and invocations.
+# - TCP keep-alive stops idle pooled connections from being dropped between
+#   invocations, so warm invocations skip the TLS handshake
+# - Short timeouts: a post to API Gateway normally completes in milliseconds,
+#   so a stalled connection fails fast (and is retried) instead of holding
+#   up the stream
+# - Posts are made by one publisher thread per invocation, so a single
+#   keep-alive HTTP/1.1 connection per endpoint is all that is ever in use;
+#   HTTP/2 multiplexing would have nothing to multiplex (and concurrent posts
+#   could reach the client out of order)
+# - The first connection to an endpoint is opened in the background while
+#   Bedrock starts up (see _warm_connection)
+_HTTP = urllib3.PoolManager(
+    maxsize=2,
+    timeout=urllib3.Timeout(connect=1, read=3),
+    retries=urllib3.Retry(total=2, backoff_factor=0.1),
+    socket_options=urllib3.connection.HTTPConnection.default_socket_options
+    + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+)
+
+# SigV4 signing key cache
+#
+# The SigV4 signing key is derived with four chained HMACs over the secret key,
+# date, region and service, and only changes when the date rolls over or the
+# credentials rotate. Caching it keyed by (access key, date) leaves a single
+# HMAC of the string-to-sign per request instead of five.
+_SIGNING_KEYS = {}
+
+# Logging
+# The standard logging module formats arguments only when the level is
+# enabled, so set LOG_LEVEL=DEBUG for verbose output (default INFO)
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# Bedrock model used for every stream
+_MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+# Token batching thresholds
+# A batch is sent when it holds this many tokens or characters of text, or
+# when this much time has passed since the previous send, whichever comes
+# first. The time limit keeps slow streams feeling live; the size limits keep
+# each WebSocket frame small. All three can be tuned with the
+# STREAM_BATCH_MAX_TOKENS / STREAM_BATCH_MAX_CHARS / STREAM_BATCH_MAX_MS
+# environment variables.
+_BATCH_MAX_TOKENS = int(os.getenv("STREAM_BATCH_MAX_TOKENS", "64"))
+_BATCH_MAX_CHARS = int(os.getenv("STREAM_BATCH_MAX_CHARS", "2048"))
+_BATCH_MAX_SECONDS = int(os.getenv("STREAM_BATCH_MAX_MS", "50")) / 1000
+
+# Batch compression
+# "tokens" messages of at least this many bytes are sent gzip-compressed and
+# base64-encoded inside a {"enc": "gzip+b64", "data": "..."} envelope, which
+# clients unwrap before parsing (see WebSocketClient.tsx). Small messages are
+# sent as they are: below a few hundred bytes the gzip header and the base64
+# expansion outweigh the savings. Set STREAM_COMPRESS_THRESHOLD_BYTES=0 to
+# disable compression.
+_COMPRESS_THRESHOLD_BYTES = int(os.getenv("STREAM_COMPRESS_THRESHOLD_BYTES", "512"))
+_COMPRESSED_FRAME_PREFIX = b'{"enc":"gzip+b64","data":"'
+
+# JSON encoding
+# Every message sent to the client is encoded with orjson, which produces
+# compact UTF-8 output (no whitespace, no \uXXXX escaping of non-ASCII text),
+# so messages are smaller on the wire as well as faster to build.
+
+# Pre-encoded start of every "tokens" message
+# Only the sequence number and the token list change between messages, so
+# the envelope is built from constant bytes plus orjson (a C extension that
+# encodes strings several times faster than json) instead of serializing a
+# new dict each time. The bytes are sent as the request body unchanged.
+_TOKENS_FRAME_PREFIX = b'{"type":"tokens","sequence":'
+
+# Text of a text_delta event, as a JSON string literal (escapes included)
+_TEXT_DELTA_RE = re.compile(rb'"type":"text_delta","text":("(?:[^"\\]|\\.)*")')
+
+
+def _get_signing_key(secret_key, access_key, short_date):
+    """
+    Return the SigV4 signing key for execute-api, deriving it once per day
+
+    kSigning = HMAC(HMAC(HMAC(HMAC("AWS4" + secret, date), region), service),
+                    "aws4_request")
+    """
+    cache_key = (access_key, short_date)
+    signing_key = _SIGNING_KEYS.get(cache_key)
+    if signing_key is None:
+        signing_key = ("AWS4" + secret_key).encode("utf-8")
+        for part in (short_date, _REGION, "execute-api", "aws4_request"):
+            signing_key = hmac.new(
+                signing_key, part.encode("utf-8"), hashlib.sha256
+            ).digest()
+
+        # Only the current date and credentials are ever needed again
+        _SIGNING_KEYS.clear()
+        _SIGNING_KEYS[cache_key] = signing_key
+    return signing_key
+
+
+class _TokenBatcher:
+    """
+    Coalesce streamed tokens into "tokens" messages
+
+    Tokens are queued with add(); once a batching threshold is reached the
+    buffered tokens are encoded into one message and handed to `send`.
+    flush() sends whatever is still buffered, e.g. at the end of a stream.
+
+    Args:
+        send (callable): Called with each encoded message (bytes)
+    """
+
+    def __init__(self, send):
+        self._send = send
+        self._tokens = []
+        self._chars = 0
+        self._last_flush = time.monotonic()
+        # Number of messages sent so far, used as the message sequence number
+        self.sequence = 0
+
+    def add(self, text):
+        """Buffer one token, sending the batch if it is large or old enough"""
+        self._tokens.append(text)
+        self._chars += len(text)
+        if (
+            len(self._tokens) >= _BATCH_MAX_TOKENS
+            or self._chars >= _BATCH_MAX_CHARS
+            or time.monotonic() - self._last_flush >= _BATCH_MAX_SECONDS
+        ):
+            self.flush()
+
+    def flush(self):
+        """Encode the buffered tokens as one message and send it"""
+        if not self._tokens:
+            return
+        self.sequence += 1
+        # Per-batch logging only when DEBUG is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Sending batch %d: %d tokens, %d chars",
+                self.sequence,
+                len(self._tokens),
+                self._chars,
+            )
+        # {"type": "tokens", "sequence": n, "tokens": [...]}
+        message = (
+            _TOKENS_FRAME_PREFIX
+            + str(self.sequence).encode()  # Optional: for ordering
+            + b',"tokens":'
+            + orjson.dumps(self._tokens)
+            + b"}"
+        )
+        # Large batches go out compressed, but only if that actually
+        # makes them smaller (level 1: fastest, most of the gain on text)
+        if _COMPRESS_THRESHOLD_BYTES and len(message) >= _COMPRESS_THRESHOLD_BYTES:
+            compressed = (
+                _COMPRESSED_FRAME_PREFIX
+                + base64.b64encode(gzip.compress(message, compresslevel=1, mtime=0))
+                + b'"}'
+            )
+            if len(compressed) < len(message):
+                message = compressed
+        self._send(message)
+        self._tokens = []
+        self._chars = 0
+        self._last_flush = time.monotonic()
+
+
+def _connections_request(method, domain_name, stage, connection_id, data=b""):
+    """
+    Send one signed request to the @connections API of a WebSocket endpoint
+
+    Equivalent to the apigatewaymanagementapi client call for the same method
+    (POST = post_to_connection, GET = get_connection), signed with a minimal
+    SigV4 signer specialised for this one request shape.
+
+    Args:
+        method (str): "POST" or "GET"
+        domain_name (str): WebSocket API domain from the request context
+        stage (str): WebSocket API stage
+        connection_id (str): Target connection
+        data (bytes): Request body (empty for GET)
+
+    Returns:
+        urllib3.BaseHTTPResponse: The API Gateway response
+    """
+    credentials = _CREDENTIALS.get_frozen_credentials()
+    amz_date = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    short_date = amz_date[:8]
+
+    # Connection IDs end in "=", which is percent-encoded in the URL and
+    # encoded a second time in the canonical request (SigV4 rule for all
+    # services except S3)
+    path = f"/{stage}/@connections/{quote(connection_id, safe='')}"
+    headers = {"Host": domain_name, "X-Amz-Date": amz_date}
+    if credentials.token:
+        headers["X-Amz-Security-Token"] = credentials.token
+
+    # Canonical request: header names must be lowercase and sorted, which
+    # the insertion order above already guarantees
+    signed_headers = ";".join(name.lower() for name in headers)
+    canonical_request = "\n".join(
+        (
+            method,
+            quote(path, safe="/~"),
+            "",
+            "".join(f"{name.lower()}:{value}\n" for name, value in headers.items()),
+            signed_headers,
+            hashlib.sha256(data).hexdigest(),
+        )
+    )
+    scope = f"{short_date}/{_REGION}/execute-api/aws4_request"
+    string_to_sign = "\n".join(
+        (
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        )
+    )
+    signing_key = _get_signing_key(
+        credentials.secret_key, credentials.access_key, short_date
+    )
+    signature = hmac.new(
+        signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    headers["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={credentials.access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+
+    return _HTTP.request(
+        method, f"https://{domain_name}{path}", body=data or None, headers=headers
+    )
+
+
+def _post_to_connection(domain_name, stage, connection_id, data):
+    """
+    Send one message to a WebSocket client through the @connections API
+
+    Args:
+        domain_name (str): WebSocket API domain from the request context
+        stage (str): WebSocket API stage
+        connection_id (str): Target connection
+        data (bytes | str): Message payload
+
+    Returns:
+        bool: False if the connection is gone (HTTP 410, GoneException)
+
+    Raises:
+        RuntimeError: For any other non-2xx response
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    response = _connections_request("POST", domain_name, stage, connection_id, data)
+    if response.status == 410:
+        return False
+    if response.status >= 300:
+        raise RuntimeError(
+            f"PostToConnection failed with HTTP {response.status}: "
+            f"{response.data[:200]!r}"
+        )
+    return True
+
+
+def _warm_connection(domain_name, stage, connection_id):
+    """
+    Open the pooled HTTPS connection to a WebSocket endpoint ahead of time
+
+    The first message to an endpoint otherwise pays the TCP and TLS handshake
+    on the first-token path. A GetConnection call (no message is sent to the
+    client) made while Bedrock is still preparing its first token leaves a
+    warm keep-alive connection in the pool for the token posts. Failures are
+    harmless: the first post simply connects itself.
+    """
+    try:
+        _connections_request("GET", domain_name, stage, connection_id)
+    except Exception as e:
+        logger.debug("Connection warm-up to %s failed: %s", domain_name, e)
+
+
+def _warm_up():
+    """
+    Handle a scheduled keep-warm event (EventBridge {"warmup": true})
+
+    Keeps the execution environment alive and the pooled HTTPS connection to
+    Bedrock open with the smallest possible model call (max_tokens=1), so the
+    next real stream skips the cold start and the TLS handshake.
+    """
+    _BEDROCK.invoke_model(
+        modelId=_MODEL_ID,
+        body=b'{"anthropic_version":"bedrock-2023-05-31","max_tokens":1,'
+        b'"messages":[{"role":"user","content":"hi"}]}',
+        contentType="application/json",
+        accept="application/json",
+    )
+    logger.debug("Keep-warm ping completed")
+    return {"statusCode": 200}
 
 
 def lambda_handler(event, context):
@@ -72,49 +437,129 @@ def lambda_handler(event, context):
     }
 
     Response Messages Sent to Client:
-    {"type": "token", "token": "AWS Lambda"}   # Each AI token as generated
+    {"type": "tokens", "tokens": ["AWS", " Lambda"], "sequence": 1}  # Batched AI tokens
     {"type": "complete"}                       # Indicates streaming is finished
     {"type": "error", "message": "..."}       # Error notifications
     """
+    if event.get("warmup"):
+        return _warm_up()
 
     # Extract WebSocket connection information
-    connection_id = event["requestContext"]["connectionId"]
-    domain_name = event["requestContext"]["domainName"]
-    stage = event["requestContext"]["stage"]
+    request_context = event["requestContext"]
+    connection_id = request_context["connectionId"]
+    domain_name = request_context["domainName"]
+    stage = request_context["stage"]
 
     # Get user identity for logging and potential personalization
-    principal_id = event["requestContext"].get("identity", {}).get("principalId")
+    principal_id = (request_context.get("identity") or {}).get("principalId")
 
     # Parse the incoming message from the client
+    # (API Gateway sends "body": null for an empty message)
+    raw_body = event.get("body") or "{}"
     try:
-        body = json.loads(event.get("body", "{}"))
+        body = orjson.loads(raw_body)
         prompt = body.get("prompt", "Hello, how are you?")
-        max_tokens = body.get("options", {}).get("max_tokens", 1000)
-
-        print(f"Processing AI streaming request:")
-        print(f"  User: {principal_id}")
-        print(f"  Connection: {connection_id}")
-        print(f"  Prompt: {prompt[:100]}...")  # Log first 100 chars for privacy
-    except json.JSONDecodeError as e:
-        print(f"Invalid JSON in request body: {e}")
+        max_tokens = (body.get("options") or {}).get("max_tokens", 1000)
+
+        logger.info(
+            "Processing AI streaming request:\n"
+            "  User: %s\n"
+            "  Connection: %s\n"
+            "  Prompt: %s...",
+            principal_id,
+            connection_id,
+            prompt[:100],  # Log first 100 chars for privacy
+        )
+    except orjson.JSONDecodeError as e:
+        logger.warning("Invalid JSON in request body: %s", e)
         return {"statusCode": 400, "body": json.dumps({"error": "Invalid JSON"})}
 
-    # Create API Gateway Management API client for WebSocket communication
-    # This client allows us to send messages back to the connected WebSocket client
-    apigateway_management_api = boto3.client(
-        "apigatewaymanagementapi", endpoint_url=f"https://{domain_name}/{stage}"
+    _stream_response(
+        connection_id,
+        domain_name,
+        stage,
+        principal_id,
+        prompt,
+        max_tokens,
+        context.aws_request_id,
     )
 
-    # Create Bedrock Runtime client for AI model invocation
+    # Return success response to API Gateway
+    # The actual response to the client is sent via WebSocket messages
+    return {
+        "statusCode": 200,
+        "body": json.dumps(
+            {
+                "message": "AI streaming request processed",
+                "requestId": context.aws_request_id,
+            }
+        ),
+    }
+
+
+def queue_handler(event, context):
+    """
+    Stream worker for queued mode (SQS event source, one message per batch)
+
+    Each message is a request enqueued by enqueue.lambda_handler:
+    {"connectionId": "...", "domainName": "...", "stage": "prod",
+     "principalId": "...", "prompt": "...", "maxTokens": 1000}
+
+    _stream_response reports failures to the client itself and never raises
+    for them, so a message is not retried: a second attempt would replay
+    tokens the client has already received.
+    """
+    if event.get("warmup"):
+        return _warm_up()
+
+    for record in event["Records"]:
+        job = orjson.loads(record["body"])
+        logger.info(
+            "Processing queued streaming request for connection %s (user %s)",
+            job["connectionId"],
+            job.get("principalId"),
+        )
+        _stream_response(
+            job["connectionId"],
+            job["domainName"],
+            job["stage"],
+            job.get("principalId"),
+            job["prompt"],
+            job["maxTokens"],
+            context.aws_request_id,
+        )
+
+
+def _stream_response(
+    connection_id, domain_name, stage, principal_id, prompt, max_tokens, request_id
+):
+    """
+    Stream a Bedrock response for one prompt to a WebSocket connection
+
+    Tokens are sent as batched "tokens" messages followed by a "complete"
+    message; on failure an "error" message is sent instead (best effort).
+    """
+    # Bedrock Runtime client for AI model invocation
     # This client handles communication with AWS Bedrock AI services
-    bedrock_runtime = boto3.client("bedrock-runtime")
+    # (shared across invocations, see module scope)
+    bedrock_runtime = _BEDROCK
+
+    # No pooled connection to this endpoint yet (new execution environment
+    # or endpoint): open one in the background while Bedrock starts up
+    pool = _HTTP.connection_from_host(domain_name, port=443, scheme="https")
+    if pool.num_connections == 0:
+        threading.Thread(
+            target=_warm_connection,
+            args=(domain_name, stage, connection_id),
+            daemon=True,
+        ).start()
 
     try:
         # Invoke Claude 3.5 Sonnet with response streaming
         # This enables real-time token streaming as the AI generates the response
-        print(f"Invoking Bedrock model for user {principal_id}")
+        logger.info("Invoking Bedrock model for user %s", principal_id)
         response = bedrock_runtime.invoke_model_with_response_stream(
-            modelId="anthropic.claude-3-5-sonnet-20240620-v1:0",
+            modelId=_MODEL_ID,
             body=json.dumps(
                 {
                     "anthropic_version": "bedrock-2023-05-31",
@@ -133,91 +578,127 @@ def lambda_handler(event, context):
         # Process streaming response from Bedrock
         # The response comes as chunks containing different types of data
         token_count = 0
-        for chunk in response["body"]:
-            if "chunk" in chunk:
-                # Decode the binary chunk data to JSON
-                chunk_data = json.loads(chunk["chunk"]["bytes"].decode("utf-8"))
-
-                # Filter for content generation chunks (actual AI text)
-                if chunk_data.get("type") == "content_block_delta":
-                    text = chunk_data.get("delta", {}).get("text", "")
-                    if text:
-                        token_count += 1
-                        try:
-                            # Send the AI token immediately to the WebSocket client
-                            # This enables real-time streaming as the AI generates text
-                            apigateway_management_api.post_to_connection(
-                                ConnectionId=connection_id,
-                                Data=json.dumps(
-                                    {
-                                        "type": "token",
-                                        "token": text,
-                                        "sequence": token_count,  # Optional: for ordering
-                                    }
-                                ),
-                            )
-                        except ClientError as e:
-                            # Handle connection closure scenarios
-                            if e.response["Error"]["Code"] == "GoneException":
-                                print(
-                                    f"Connection {connection_id} closed during streaming"
-                                )
-                                print(f"  User: {principal_id}")
-                                print(f"  Tokens sent: {token_count}")
-                                break
-                            else:
-                                # Re-raise other API Gateway errors
-                                raise e
 
-        # Send completion notification to indicate streaming is finished
-        try:
-            apigateway_management_api.post_to_connection(
-                ConnectionId=connection_id,
-                Data=json.dumps(
-                    {
-                        "type": "complete",
-                        "total_tokens": token_count,
-                        "timestamp": context.aws_request_id,
-                    }
-                ),
-            )
-            print(
-                f"Streaming completed successfully for {principal_id}: {token_count} tokens"
+        # Set by the publisher thread when the client has disconnected
+        gone = threading.Event()
+
+        def post_batch(data):
+            """Send one encoded "tokens" message (runs on the publisher thread)"""
+            if gone.is_set():
+                return
+            # Other API Gateway errors raise and are re-raised by future.result()
+            if not _post_to_connection(domain_name, stage, connection_id, data):
+                # Handle connection closure scenarios
+                logger.info(
+                    "Connection %s closed during streaming (user %s)",
+                    connection_id,
+                    principal_id,
+                )
+                gone.set()
+
+        # Single publisher thread: posts overlap with reading the Bedrock
+        # stream, and messages still reach the client in order
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ws-publish"
+        ) as publisher:
+            futures = []
+            batcher = _TokenBatcher(
+                lambda data: futures.append(publisher.submit(post_batch, data))
             )
-        except ClientError as e:
-            # Don't fail if we can't send completion (connection might be closed)
-            if e.response["Error"]["Code"] != "GoneException":
-                raise e
+
+            try:
+                for chunk in response["body"]:
+                    if gone.is_set():
+                        logger.info("Stopped streaming after %d tokens", token_count)
+                        break
+
+                    if "chunk" in chunk:
+                        raw = chunk["chunk"]["bytes"]
+
+                        # Only content_block_delta events carry text; a substring
+                        # check on the raw bytes skips message_start, ping, usage
+                        # and stop events without parsing them as JSON
+                        if b'"content_block_delta"' not in raw:
+                            continue
+
+                        # Text deltas have a fixed shape
+                        # ({"type":"content_block_delta","index":0,"delta":
+                        # {"type":"text_delta","text":"..."}}), so the text string
+                        # is cut out of the raw bytes with a precompiled regex and
+                        # only that JSON string literal is decoded (orjson handles
+                        # escapes and UTF-8). Other deltas fall back to a full parse.
+                        match = _TEXT_DELTA_RE.search(raw)
+                        if match is not None:
+                            text = orjson.loads(match.group(1))
+                        else:
+                            # Decode the binary chunk data to JSON
+                            # orjson parses bytes directly, without a UTF-8 decode step
+                            chunk_data = orjson.loads(raw)
+
+                            # Filter for content generation chunks (actual AI text)
+                            if chunk_data.get("type") != "content_block_delta":
+                                continue
+                            text = chunk_data.get("delta", {}).get("text", "")
+
+                        if text:
+                            token_count += 1
+                            # Sent as part of a batch once it is large or old
+                            # enough; this keeps streaming real-time while
+                            # cutting the number of API Gateway round trips
+                            batcher.add(text)
+
+            finally:
+                # Send whatever is left in the buffer, even if the Bedrock
+                # stream failed midway, and wait for every in-flight post
+                if not gone.is_set():
+                    batcher.flush()
+                wait(futures)
+
+            # Surface unexpected errors from the publisher thread
+            for future in futures:
+                future.result()
+
+        # Send completion notification to indicate streaming is finished
+        # (a closed connection is not an error here)
+        _post_to_connection(
+            domain_name,
+            stage,
+            connection_id,
+            orjson.dumps(
+                {
+                    "type": "complete",
+                    "total_tokens": token_count,
+                    "timestamp": request_id,
+                }
+            ),
+        )
+        logger.info(
+            "Streaming completed successfully for %s: %d tokens",
+            principal_id,
+            token_count,
+        )
 
     except Exception as e:
         # Handle any errors during AI processing or WebSocket communication
         error_message = str(e)
-        print(f"Streaming error for user {principal_id}: {error_message}")
+        logger.error("Streaming error for user %s: %s", principal_id, error_message)
 
         try:
             # Attempt to notify the client about the error
-            apigateway_management_api.post_to_connection(
-                ConnectionId=connection_id,
-                Data=json.dumps(
+            _post_to_connection(
+                domain_name,
+                stage,
+                connection_id,
+                orjson.dumps(
                     {
                         "type": "error",
                         "message": error_message,
-                        "timestamp": context.aws_request_id,
+                        "timestamp": request_id,
                     }
                 ),
             )
         except:
             # If we can't send error notification, just log it
-            print(f"Could not send error notification to connection {connection_id}")
-
-    # Return success response to API Gateway
-    # The actual response to the client is sent via WebSocket messages above
-    return {
-        "statusCode": 200,
-        "body": json.dumps(
-            {
-                "message": "AI streaming request processed",
-                "requestId": context.aws_request_id,
-            }
-        ),
-    }
+            logger.warning(
+                "Could not send error notification to connection %s", connection_id
+            )
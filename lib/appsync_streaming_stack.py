@@ -11,6 +11,7 @@ from aws_cdk import (
     aws_sqs as sqs,
     aws_lambda_event_sources as lambda_event_sources,
 )
+from aws_cdk.aws_lambda_python_alpha import PythonLayerVersion
 from constructs import Construct
 from cdk_nag import NagSuppressions
 
@@ -25,13 +26,15 @@ class AppSyncStreamingStack(Stack):
 
     Key Architectural Components:
     1. AppSync GraphQL API - For client communications using subscriptions
-    2. SQS Queue - For decoupling request and processing functions
-    3. Request Lambda - Initial handler for client requests
+    2. SQS Queue - For decoupling request handling from processing
+    3. startStream JS Resolver - Sends client requests to SQS via an HTTP data source
     4. Processing Lambda - SQS-triggered function for LLM streaming
     5. DynamoDB (optional) - For session tracking
 
     The architecture follows serverless best practices by avoiding Lambda-to-Lambda
     direct invocation, instead using SQS for message passing between components.
+    Requests are enqueued by AppSync itself, so no Lambda runs on the client's
+    path before streaming starts.
     """
 
     def __init__(
@@ -83,6 +86,16 @@ class AppSyncStreamingStack(Stack):
         # - Uses sessionId as the partition key for efficient lookups
         # - Pay-per-request billing model to handle variable workloads
         # - Table will be automatically deleted when stack is destroyed
+        # - Session items carry an expiresAt attribute (24 hours after their
+        #   last update) and DynamoDB TTL deletes them without billed writes,
+        #   so the table does not grow forever
+        # - Point-in-time recovery is off for the demo's ephemeral sessions;
+        #   enable it with "sessions_table_pitr": true in cdk.json (or
+        #   `cdk deploy -c sessions_table_pitr=true`) when sessions must be
+        #   recoverable
+        sessions_table_pitr = (
+            str(self.node.try_get_context("sessions_table_pitr")).lower() == "true"
+        )
         sessions_table = dynamodb.Table(
             self,
             "SessionsTable",
@@ -92,8 +105,46 @@ class AppSyncStreamingStack(Stack):
             ),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             removal_policy=RemovalPolicy.DESTROY,
-            point_in_time_recovery=True,
+            time_to_live_attribute="expiresAt",
+            point_in_time_recovery_specification=dynamodb.PointInTimeRecoverySpecification(
+                point_in_time_recovery_enabled=sessions_table_pitr
+            ),
+        )
+        if not sessions_table_pitr:
+            NagSuppressions.add_resource_suppressions(
+                sessions_table,
+                [
+                    {
+                        "id": "AwsSolutions-DDB3",
+                        "reason": "Session items are ephemeral and expire after 24 hours; point-in-time recovery can be enabled with the sessions_table_pitr context flag",
+                    }
+                ],
+            )
+
+        # FIFO queues (opt-in)
+        #
+        # `cdk deploy -c streaming_queue_fifo=true` makes the request queues
+        # (and their DLQ, which must match) FIFO queues:
+        # - The startStream resolver sends each session as its own message
+        #   group with the sessionId as deduplication ID, so a retried
+        #   SendMessage within the 5-minute deduplication window never starts
+        #   a second (billed) Bedrock stream
+        # - High throughput mode scopes deduplication and throughput limits to
+        #   the message group, so one group per session keeps sessions fully
+        #   parallel
+        # - Lambda does not support a batching window on FIFO event sources,
+        #   so processing_batching_window_seconds is ignored
+        queue_fifo = (
+            str(self.node.try_get_context("streaming_queue_fifo")).lower() == "true"
         )
+        queue_type_props = {}
+        if queue_fifo:
+            queue_type_props = {
+                "fifo": True,
+                "content_based_deduplication": True,
+                "deduplication_scope": sqs.DeduplicationScope.MESSAGE_GROUP,
+                "fifo_throughput_limit": sqs.FifoThroughputLimit.PER_MESSAGE_GROUP_ID,
+            }
 
         # Create DLQ with SSL enforcement
         streaming_dlq = sqs.Queue(
@@ -104,9 +155,10 @@ class AppSyncStreamingStack(Stack):
             ),  # Keep failed messages for 2 weeks for analysis
             # Fixed: Enforce SSL for SQS (SQS4)
             enforce_ssl=True,
+            **queue_type_props,
         )
 
-        # Create an SQS queue for processing LLM stream requests
+        # Create the SQS queues for processing LLM stream requests
         #
         # Message Queue Architecture:
         # Unlike direct Lambda-to-Lambda invocation (anti-pattern), using SQS:
@@ -114,40 +166,117 @@ class AppSyncStreamingStack(Stack):
         # 2. Provides automatic retries - Failed messages are retried according to queue settings
         # 3. Enables resilience - Dead-letter queue captures failures for troubleshooting
         # 4. Improves scaling - Can buffer requests during traffic spikes
-        streaming_queue = sqs.Queue(
-            self,
-            "StreamingQueue",
-            # Visibility timeout must be greater than Lambda timeout to prevent duplicate processing
-            visibility_timeout=Duration.minutes(16),
-            # Message retention defines how long messages stay in queue if not processed
-            retention_period=Duration.hours(1),
-            enforce_ssl=True,
-            # Dead-letter queue for capturing failed processing attempts
-            dead_letter_queue=sqs.DeadLetterQueue(
-                max_receive_count=3,  # After 3 failed attempts, send to DLQ
-                queue=streaming_dlq,
-            ),
-        )
+        #
+        # Queue Sharding:
+        # - A single queue (and its event source) eventually caps the request rate
+        #   of the whole system; requests can be spread over several shards with
+        #   `cdk deploy -c streaming_queue_shards=4`
+        # - The startStream resolver picks a shard from the sessionId, and every shard
+        #   triggers the same processing Lambda with its own event source
+        # - Shard 0 keeps the original construct ID, so the default single-queue
+        #   deployment is unchanged
+        queue_shards = int(self.node.try_get_context("streaming_queue_shards") or 1)
+
+        # Timeouts
+        #
+        # A response is capped at 1000 tokens, so a stream (and a batch of
+        # parallel streams) finishes well within a minute; 2 minutes leaves
+        # headroom over the P99 stream duration while bounding the billed
+        # duration of a runaway invocation. Re-check against the function's
+        # CloudWatch Duration P99 when the model or token limit changes.
+        #
+        # Ratio rule: the queue's visibility timeout is 6x the function
+        # timeout, so a message is never redelivered while an invocation
+        # (including Lambda's own retries of a throttled batch) may still be
+        # processing it, yet a genuinely failed message becomes visible again
+        # within minutes instead of a quarter of an hour.
+        processing_timeout = Duration.minutes(2)
+        queue_visibility_timeout = Duration.minutes(12)
+
+        streaming_queues = []
+        for shard in range(queue_shards):
+            streaming_queues.append(
+                sqs.Queue(
+                    self,
+                    "StreamingQueue" if shard == 0 else f"StreamingQueue{shard}",
+                    # Visibility timeout is 6x the Lambda timeout (see above)
+                    visibility_timeout=queue_visibility_timeout,
+                    # Message retention defines how long messages stay in queue if not processed
+                    retention_period=Duration.hours(1),
+                    enforce_ssl=True,
+                    # Dead-letter queue for capturing failed processing attempts
+                    dead_letter_queue=sqs.DeadLetterQueue(
+                        max_receive_count=3,  # After 3 failed attempts, send to DLQ
+                        queue=streaming_dlq,
+                    ),
+                    **queue_type_props,
+                )
+            )
+        streaming_queue = streaming_queues[0]
 
         # 2. Processing Lambda: The long-running function that calls Bedrock
         #
         # SQS-Triggered Processing Lambda:
         # - Receives messages from SQS queue rather than direct invocation
-        # - Handles the long-running LLM stream processing (up to 15 minutes)
+        # - Handles the long-running LLM stream processing (up to 2 minutes)
         # - Communicates back to clients through AppSync subscriptions
         # - Higher memory allocation for faster processing of LLM responses
+        # Create a Lambda Layer with the processing dependencies
+        #
+        # Python Lambda Layer Pattern:
+        # - Built from lambda_functions/appsync/requirements.txt
+        # - Built in a Lambda-like environment to ensure binary compatibility
+        # - Contains orjson, a compiled extension used on the per-token path
+        # - Contains cachetools for the completed-session cache
+        # - Built for ARM64, so pip resolves the aarch64 (manylinux) orjson wheel
+        #   that matches the Graviton processing function
+        appsync_deps_layer = PythonLayerVersion(
+            self,
+            "AppSyncDepsLayer",
+            entry="lambda_functions/appsync",  # Directory containing requirements.txt
+            compatible_runtimes=[_lambda.Runtime.PYTHON_3_13],  # Target runtime
+            compatible_architectures=[_lambda.Architecture.ARM_64],
+            description="Dependencies for AppSync streaming Lambdas (orjson, cachetools)",
+        )
+
+        # Memory (and the proportional CPU share) for the processing Lambda
+        #
+        # The function is mostly I/O-bound, with CPU bursts for SigV4 signing
+        # and JSON encoding. Measure cost and duration across memory sizes
+        # (e.g. 512-3008 MB with AWS Lambda Power Tuning and a representative
+        # SQS event) and set the best value in cdk.json ("processing_memory_mb")
+        # or with `cdk deploy -c processing_memory_mb=1536`
+        processing_memory_mb = int(
+            self.node.try_get_context("processing_memory_mb") or 1024
+        )
+
         processing_function = _lambda.Function(
             self,
             "StreamingProcessingFunction",
-            runtime=_lambda.Runtime.PYTHON_3_12,
+            # Python 3.13 runs the per-token signing and JSON glue on a faster
+            # interpreter than 3.12, with no code changes
+            runtime=_lambda.Runtime.PYTHON_3_13,
             handler="processing.lambda_handler",
             code=_lambda.Code.from_asset("lambda_functions/appsync"),
-            timeout=Duration.minutes(15),  # Long timeout for streaming responses
-            memory_size=1024,  # Higher memory allocation for performance
+            # Graviton: lower price per GB-second for the same I/O-bound code
+            architecture=_lambda.Architecture.ARM_64,
+            timeout=processing_timeout,  # Covers P99 stream duration with headroom
+            memory_size=processing_memory_mb,  # Tuned via context (default 1024 MB)
             log_retention=logs.RetentionDays.ONE_WEEK,
+            layers=[appsync_deps_layer],  # orjson for the streaming hot path
             environment={
                 "APPSYNC_API_URL": api.graphql_url,  # Used for publishing tokens
                 "SESSIONS_TABLE": sessions_table.table_name,  # For session management
+                # Token history is written to the session item in batches:
+                # one DynamoDB update per 25 tokens or 250 ms, not per token
+                "BUFFER_COUNT": "25",
+                "BUFFER_MS": "250",
+                # Tokens are published to subscribers in publishTokens batches
+                # of up to 16 tokens or 2048 characters, or after 50 ms,
+                # whichever comes first
+                "PUBLISH_BATCH_COUNT": "16",
+                "PUBLISH_BATCH_MS": "50",
+                "PUBLISH_BATCH_CHARS": "2048",
             },
         )
 
@@ -155,23 +284,50 @@ class AppSyncStreamingStack(Stack):
         #
         # Event Source Pattern:
         # - Lambda is triggered automatically when messages arrive in SQS
-        # - Batch size of 1 ensures one LLM request is processed at a time
-        # - Zero batching window means messages are processed immediately
+        # - Up to 10 messages per invocation; the handler streams them in
+        #   parallel, amortizing cold starts and warm clients across requests
+        # - Zero batching window: a user is waiting for the first token, so
+        #   Lambda never holds a lone message back to fill a batch; batches
+        #   form naturally when several messages are already queued
+        # - Maximum concurrency bounds parallel Bedrock streams
+        #   (10 invocations x 10 messages) to protect model quotas
         # - Report batch failures enables partial batch success handling
-        processing_function.add_event_source(
-            lambda_event_sources.SqsEventSource(
-                streaming_queue,
-                batch_size=1,  # Process one message at a time
-                max_batching_window=Duration.seconds(0),  # Process immediately
-                report_batch_item_failures=True,  # Enable partial batch failures
-            )
+        # - One event source per queue shard
+        #
+        # For throughput-oriented deployments where a short wait before the
+        # first token is acceptable, a batching window lets Lambda fill larger
+        # batches (fewer invocations and SQS polls per request), and the
+        # concurrency cap can be raised in line with the Bedrock quota:
+        #   `cdk deploy -c processing_batching_window_seconds=1 -c processing_max_concurrency=20`
+        batching_window_seconds = int(
+            self.node.try_get_context("processing_batching_window_seconds") or 0
+        )
+        max_concurrency = int(
+            self.node.try_get_context("processing_max_concurrency") or 10
         )
+        for queue in streaming_queues:
+            processing_function.add_event_source(
+                lambda_event_sources.SqsEventSource(
+                    queue,
+                    batch_size=10,  # Stream up to 10 requests per invocation
+                    # Process immediately unless a batching window is configured
+                    # (not supported on FIFO queues)
+                    max_batching_window=(
+                        None
+                        if queue_fifo
+                        else Duration.seconds(batching_window_seconds)
+                    ),
+                    max_concurrency=max_concurrency,  # Cap concurrent invocations per shard
+                    report_batch_item_failures=True,  # Enable partial batch failures
+                )
+            )
 
         # Grant processing Lambda permission to invoke Bedrock
         #
         # IAM Permissions:
         # - Allows the Lambda to invoke Bedrock streaming APIs
         # - Uses streaming variant of the API for real-time token delivery
+        # - ConverseStream is authorized by the InvokeModelWithResponseStream action
         processing_function.add_to_role_policy(
             iam.PolicyStatement(
                 actions=["bedrock:InvokeModelWithResponseStream"],
@@ -183,43 +339,75 @@ class AppSyncStreamingStack(Stack):
         #
         # Service-to-Service Authentication:
         # - Lambda needs to authenticate to AppSync using IAM
-        # - Restricted to just the publishToken mutation for security
+        # - Restricted to just the publishToken/publishTokens mutations for security
         # - Uses the GraphQL endpoint to send real-time updates
         processing_function.add_to_role_policy(
             iam.PolicyStatement(
                 actions=["appsync:GraphQL"],
-                resources=[f"{api.arn}/types/Mutation/fields/publishToken"],
+                resources=[
+                    f"{api.arn}/types/Mutation/fields/publishToken",
+                    f"{api.arn}/types/Mutation/fields/publishTokens",
+                ],
             )
         )
 
-        # 1. Request Lambda: The short-lived function linked to the AppSync resolver
-        #
-        # Fast-Response Request Pattern:
-        # - Short-lived function (30-second timeout) for quick response to client
-        # - Handles initial request validation and session creation
-        # - Delegates actual processing to SQS/Processing Lambda
-        # - Uses minimal memory as it only performs lightweight operations
-        request_function = _lambda.Function(
-            self,
-            "StreamingRequestFunction",
-            runtime=_lambda.Runtime.PYTHON_3_12,
-            handler="request.lambda_handler",
-            code=_lambda.Code.from_asset("lambda_functions/appsync"),
-            timeout=Duration.seconds(30),  # Short timeout as it returns quickly
-            memory_size=256,  # Lower memory as it's not doing intensive work
-            log_retention=logs.RetentionDays.ONE_WEEK,
-            environment={
-                "STREAMING_QUEUE_URL": streaming_queue.queue_url,  # Used for sending messages to queue
-            },
-        )
-
-        # Grant request Lambda permission to send messages to SQS
+        # AppSync Event API for token delivery (opt-in)
         #
-        # Request-to-Queue Pattern:
-        # - Request Lambda needs permission to put messages into SQS
-        # - This replaces direct Lambda-to-Lambda invocation
-        # - More loosely coupled design for better error handling and scalability
-        streaming_queue.grant_send_messages(request_function)
+        # Pub/Sub Channels:
+        # - `cdk deploy -c appsync_event_api=true` adds an AppSync Event API
+        #   with a "bedrock-stream" channel namespace
+        # - The processing Lambda publishes each token batch to the channel
+        #   /bedrock-stream/{sessionId} with one signed HTTP call, instead of a
+        #   publishTokens mutation that AppSync must parse and resolve
+        # - Clients subscribe to their session's channel over the Event API
+        #   WebSocket, authenticated with the same Cognito user pool
+        # - Only the Lambda's IAM role may publish; only signed-in users may
+        #   connect and subscribe
+        # - startStream stays on the GraphQL API, which keeps serving the
+        #   onTokenReceived subscription when the Event API is not enabled
+        event_api = None
+        if str(self.node.try_get_context("appsync_event_api")).lower() == "true":
+            event_api = appsync.EventApi(
+                self,
+                "StreamingEventApi",
+                api_name="bedrock-streaming-events",
+                authorization_config=appsync.EventApiAuthConfig(
+                    auth_providers=[
+                        appsync.AppSyncAuthProvider(
+                            authorization_type=appsync.AppSyncAuthorizationType.USER_POOL,
+                            cognito_config=appsync.AppSyncCognitoConfig(
+                                user_pool=user_pool
+                            ),
+                        ),
+                        appsync.AppSyncAuthProvider(
+                            authorization_type=appsync.AppSyncAuthorizationType.IAM,
+                        ),
+                    ],
+                    connection_auth_mode_types=[
+                        appsync.AppSyncAuthorizationType.USER_POOL
+                    ],
+                    default_publish_auth_mode_types=[
+                        appsync.AppSyncAuthorizationType.IAM
+                    ],
+                    default_subscribe_auth_mode_types=[
+                        appsync.AppSyncAuthorizationType.USER_POOL
+                    ],
+                ),
+                log_config=appsync.AppSyncLogConfig(
+                    retention=logs.RetentionDays.ONE_WEEK,
+                    field_log_level=appsync.AppSyncFieldLogLevel.INFO,
+                ),
+            )
+            event_api.add_channel_namespace(
+                "StreamChannelNamespace", channel_namespace_name="bedrock-stream"
+            )
+            event_api.grant_publish(processing_function)
+            processing_function.add_environment(
+                "EVENT_API_HTTP_DOMAIN", event_api.http_dns
+            )
+            processing_function.add_environment(
+                "EVENT_CHANNEL_NAMESPACE", "bedrock-stream"
+            )
 
         # Grant processing Lambda permission to read/write to DynamoDB
         #
@@ -229,26 +417,57 @@ class AppSyncStreamingStack(Stack):
         # - Enables resumability and analytics capabilities
         sessions_table.grant_read_write_data(processing_function)
 
-        # Create Lambda data source for the AppSync 'startStream' mutation
+        # Create HTTP data source for the AppSync 'startStream' mutation
+        #
+        # Direct Service Integration:
+        # - AppSync calls the SQS API itself through an HTTP data source
+        # - Requests are signed with SigV4 (service "sqs") using the data
+        #   source's IAM role, so no credentials live in the resolver
+        # - Replaces a request Lambda whose only job was to enqueue the
+        #   message: no invocation or cold start sits between the client's
+        #   mutation and the queue
+        sqs_data_source = api.add_http_data_source(
+            "SqsDataSource",
+            f"https://sqs.{self.region}.amazonaws.com",
+            name="SqsDataSource",
+            description="HTTP data source for sending stream requests to SQS",
+            authorization_config=appsync.AwsIamConfig(
+                signing_region=self.region,
+                signing_service_name="sqs",
+            ),
+        )
+
+        # Grant the data source role permission to send messages to SQS
         #
-        # AppSync Data Source:
-        # - Links the GraphQL API to the request Lambda function
-        # - When the startStream mutation is called, this Lambda is invoked
-        # - Provides the integration between client GraphQL operations and backend processing
-        lambda_data_source = api.add_lambda_data_source(
-            "StreamingDataSource",
-            request_function,  # Link the request function to the resolver
-            name="StreamingDataSource",
-            description="Lambda data source for starting the Bedrock stream",
+        # Request-to-Queue Pattern:
+        # - AppSync needs permission to put messages into every queue shard
+        # - This replaces direct Lambda-to-Lambda invocation
+        # - More loosely coupled design for better error handling and scalability
+        for queue in streaming_queues:
+            queue.grant_send_messages(sqs_data_source)
+
+        # Queue shard URLs for the resolver, as AppSync environment variables
+        # (one variable per shard keeps every value short)
+        api.add_environment_variable(
+            "STREAMING_QUEUE_SHARDS", str(len(streaming_queues))
         )
+        api.add_environment_variable("STREAMING_QUEUE_FIFO", str(queue_fifo).lower())
+        for shard, queue in enumerate(streaming_queues):
+            api.add_environment_variable(
+                f"STREAMING_QUEUE_URL_{shard}", queue.queue_url
+            )
 
-        # Create NONE data source for publishToken mutation
+        # Create NONE data source for the publish mutations
         #
         # NONE Data Source:
         # - Special AppSync data source that doesn't connect to a backend
-        # - Used for the publishToken mutation which is called by the processing Lambda
+        # - Used for the publishToken/publishTokens mutations called by the
+        #   processing Lambda
         # - AppSync handles the direct mapping between request and response
         # - Enables server-to-server communication (Processing Lambda → AppSync)
+        # - No resolver Lambda runs per publish: the JS resolver builds the
+        #   subscription payload inside AppSync, so publishing costs no extra
+        #   invocation, cold start or billed duration
         none_data_source = api.add_none_data_source(
             "NoneDataSource",
             name="NoneDataSource",
@@ -259,55 +478,44 @@ class AppSyncStreamingStack(Stack):
         #
         # Client-Facing Resolver Pattern:
         # - Handles the initial client mutation to start streaming
-        # - Maps directly to the request Lambda data source
-        # - Uses default mapping templates to pass all arguments to Lambda
-        # - Returns the Lambda's response back to the client (sessionId, etc.)
+        # - JavaScript resolver (APPSYNC_JS runtime) on the SQS HTTP data source
+        # - The request handler creates the sessionId, picks a queue shard and
+        #   builds the SQS SendMessage call
+        # - The response handler returns the sessionId to the client immediately
         api.create_resolver(
             "StartStreamResolver",
             type_name="Mutation",
             field_name="startStream",
-            data_source=lambda_data_source,
-            request_mapping_template=appsync.MappingTemplate.lambda_request(),
-            response_mapping_template=appsync.MappingTemplate.lambda_result(),
+            data_source=sqs_data_source,
+            runtime=appsync.FunctionRuntime.JS_1_0_0,
+            code=appsync.Code.from_asset("lib/resolvers/startStream.js"),
         )
 
-        # Resolver for publishToken mutation
+        # Resolvers for the publishToken and publishTokens mutations
         #
         # Server-to-Server Resolver Pattern:
-        # - This mutation is not called by clients, but by the processing Lambda
-        # - Uses the NONE data source with custom VTL mapping templates
-        # - When processing Lambda calls this mutation, it triggers subscriptions
+        # - These mutations are not called by clients, but by the processing Lambda
+        # - Uses the NONE data source: the request payload becomes the result
+        # - When processing Lambda calls a mutation, it triggers subscriptions
         # - Clients listening via subscription will receive these tokens in real-time
         # - The key to implementing real-time streaming to multiple clients
-        api.create_resolver(
-            "PublishTokenResolver",
-            type_name="Mutation",
-            field_name="publishToken",
-            data_source=none_data_source,
-            request_mapping_template=appsync.MappingTemplate.from_string(
-                """
-            {
-                "version": "2018-05-29",
-                "payload": {
-                    "sessionId": $util.toJson($ctx.args.sessionId),
-                    "token": $util.toJson($ctx.args.token),
-                    "isComplete": $util.toJson($ctx.args.isComplete),
-                    "timestamp": $util.toJson($util.time.nowISO8601())
-                }
-            }
-            """
-            ),
-            response_mapping_template=appsync.MappingTemplate.from_string(
-                """
-            {
-                "sessionId": $util.toJson($ctx.args.sessionId),
-                "token": $util.toJson($ctx.args.token),
-                "isComplete": $util.toJson($ctx.args.isComplete),
-                "timestamp": $util.toJson($util.time.nowISO8601())
-            }
-            """
-            ),
-        )
+        # - publishTokens is the batched variant: the processing Lambda buffers
+        #   several Bedrock tokens per mutation, cutting AppSync requests per
+        #   response; onTokenReceived subscribes to both mutations
+        #
+        # One JavaScript resolver (APPSYNC_JS runtime) serves both mutations:
+        # it passes the arguments through and adds a single timestamp, instead
+        # of VTL templates that serialized every field separately in both the
+        # request and the response mapping
+        for field_name in ("publishToken", "publishTokens"):
+            api.create_resolver(
+                f"{field_name[0].upper()}{field_name[1:]}Resolver",
+                type_name="Mutation",
+                field_name=field_name,
+                data_source=none_data_source,
+                runtime=appsync.FunctionRuntime.JS_1_0_0,
+                code=appsync.Code.from_asset("lib/resolvers/publish.js"),
+            )
 
         # Output values for cross-stack references
         #
@@ -316,10 +524,11 @@ class AppSyncStreamingStack(Stack):
         # - Enables modular architecture with cross-stack references
         # - Useful for larger applications with multiple deployment stacks
         self.api = api
-        self.request_function = request_function
+        self.event_api = event_api
         self.processing_function = processing_function
         self.sessions_table = sessions_table
         self.streaming_queue = streaming_queue
+        self.streaming_queues = streaming_queues
         self.user_pool = user_pool
         self.user_pool_client = user_pool_client
 
@@ -339,6 +548,14 @@ class AppSyncStreamingStack(Stack):
             description="AppSync GraphQL API URL for client connections",
         )
 
+        if event_api is not None:
+            CfnOutput(
+                self,
+                "EventApiHttpEndpoint",
+                value=f"https://{event_api.http_dns}/event",
+                description="AppSync Event API endpoint for channel subscriptions",
+            )
+
         CfnOutput(
             self,
             "StreamingQueueURL",
@@ -353,13 +570,6 @@ class AppSyncStreamingStack(Stack):
             description="AppSync API ID for configuration reference",
         )
 
-        CfnOutput(
-            self,
-            "RequestFunctionName",
-            value=request_function.function_name,
-            description="Lambda function name for request handling",
-        )
-
         CfnOutput(
             self,
             "ProcessingFunctionName",
@@ -396,16 +606,6 @@ class AppSyncStreamingStack(Stack):
             ],
         )
 
-        NagSuppressions.add_resource_suppressions(
-            request_function.role,
-            [
-                {
-                    "id": "AwsSolutions-IAM4",
-                    "reason": "AWSLambdaBasicExecutionRole is the standard managed policy for Lambda execution roles and provides necessary CloudWatch Logs permissions",
-                },
-            ],
-        )
-
         # Suppress AppSync API logs role managed policy usage
         NagSuppressions.add_resource_suppressions(
             api.node.find_child("ApiLogsRole"),
@@ -417,19 +617,6 @@ class AppSyncStreamingStack(Stack):
             ],
         )
 
-        # Suppress lambda data source service role wildcard permissions
-        NagSuppressions.add_resource_suppressions(
-            lambda_data_source.node.find_child("ServiceRole").node.find_child(
-                "DefaultPolicy"
-            ),
-            [
-                {
-                    "id": "AwsSolutions-IAM5",
-                    "reason": "AppSync Lambda data source requires wildcard permissions to invoke the associated Lambda function with dynamic ARN suffixes",
-                }
-            ],
-        )
-
         # Suppress processing function default policy wildcard permissions
         NagSuppressions.add_resource_suppressions(
             processing_function.role.node.find_child("DefaultPolicy"),
@@ -442,13 +629,13 @@ class AppSyncStreamingStack(Stack):
         )
 
         # Suppress Lambda runtime findings for Python functions
-        for func in [processing_function, request_function]:
+        for func in [processing_function]:
             NagSuppressions.add_resource_suppressions(
                 func,
                 [
                     {
                         "id": "AwsSolutions-L1",
-                        "reason": "Python 3.12 is the latest stable Python runtime available in AWS Lambda. Using the current stable version for reliability.",
+                        "reason": "Python 3.13 is a current, supported Python runtime in AWS Lambda and is pinned so the dependency layer is built for the same version.",
                     }
                 ],
             )
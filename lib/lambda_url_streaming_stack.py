@@ -2,6 +2,8 @@ from aws_cdk import (
     Stack,
     CfnOutput,
     Duration,
+    RemovalPolicy,
+    aws_dynamodb as dynamodb,
     aws_lambda as _lambda,
     aws_iam as iam,
     aws_cognito as cognito,
@@ -23,6 +25,7 @@ class LambdaUrlStreamingStack(Stack):
     1. Lambda Function - A single Node.js Lambda function with response streaming enabled
     2. Function URL - HTTP endpoint with CORS configuration for direct client access
     3. Cognito Authentication - JWT validation happens inside the Lambda function
+    4. DynamoDB Prompt Cache (optional) - Complete responses for repeated prompts
 
     Benefits of this Architecture:
     - Simplicity: Single function with no additional AWS services needed
@@ -83,6 +86,46 @@ class LambdaUrlStreamingStack(Stack):
             },
         )
 
+        # Create DynamoDB table for the prompt cache
+        #
+        # Prompt Cache Table:
+        # - Maps sha256(user + model + prompt) to the complete generated response;
+        #   the caller's Cognito sub is part of the key, so entries are never
+        #   shared between users
+        # - A prompt the same user repeats is answered with one GetItem instead
+        #   of a Bedrock stream, saving both model tokens and generation time,
+        #   at the price of replaying the earlier generation
+        # - Opt-in: off by default (0); enable with e.g.
+        #   `cdk deploy -c prompt_cache_ttl_hours=24`, after which DynamoDB TTL
+        #   removes entries that many hours after they were written
+        # - Pay-per-request billing; the table only holds disposable data, so it
+        #   is destroyed with the stack and has no point-in-time recovery
+        prompt_cache_ttl_hours = self.node.try_get_context("prompt_cache_ttl_hours")
+        prompt_cache_ttl_hours = (
+            0 if prompt_cache_ttl_hours is None else int(prompt_cache_ttl_hours)
+        )
+        prompt_cache_table = None
+        if prompt_cache_ttl_hours > 0:
+            prompt_cache_table = dynamodb.Table(
+                self,
+                "PromptCache",
+                partition_key=dynamodb.Attribute(
+                    name="promptHash", type=dynamodb.AttributeType.STRING
+                ),
+                time_to_live_attribute="expiresAt",
+                billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+                removal_policy=RemovalPolicy.DESTROY,
+            )
+            NagSuppressions.add_resource_suppressions(
+                prompt_cache_table,
+                [
+                    {
+                        "id": "AwsSolutions-DDB3",
+                        "reason": "The prompt cache only holds disposable, expiring copies of model responses; point-in-time recovery would add cost without a recovery need",
+                    }
+                ],
+            )
+
         # Create Lambda function for streaming responses
         #
         # Response Streaming Lambda:
@@ -105,6 +148,18 @@ class LambdaUrlStreamingStack(Stack):
             },
         )
 
+        # Prompt cache access: point reads and writes only
+        if prompt_cache_table is not None:
+            streaming_function.add_environment(
+                "PROMPT_CACHE_TABLE", prompt_cache_table.table_name
+            )
+            streaming_function.add_environment(
+                "PROMPT_CACHE_TTL_SECONDS", str(prompt_cache_ttl_hours * 3600)
+            )
+            prompt_cache_table.grant(
+                lambda_role, "dynamodb:GetItem", "dynamodb:PutItem"
+            )
+
         # Add CDK-Nag suppressions for acceptable findings
         NagSuppressions.add_resource_suppressions(
             lambda_role,
@@ -128,6 +183,20 @@ class LambdaUrlStreamingStack(Stack):
         # - RESPONSE_STREAM invoke mode is critical for enabling HTTP streaming
         # - CORS configuration enables browser clients to access the endpoint
         # - Authentication handled via JWT tokens inside the function, not at URL level
+        #
+        # Allowed Origins:
+        # - Any origin is allowed by default so the local demo client works as is
+        # - Deployments with a known frontend can name it, e.g.
+        #   `cdk deploy -c cors_allowed_origins=https://app.example.com`
+        #   (comma-separated); browsers then cache the preflight for that origin
+        #   and other sites can no longer call the endpoint from a browser
+        allowed_origins = [
+            origin.strip()
+            for origin in str(
+                self.node.try_get_context("cors_allowed_origins") or "*"
+            ).split(",")
+            if origin.strip()
+        ]
         function_url = streaming_function.add_function_url(
             # No authorization at the URL level; handled by the function itself
             auth_type=_lambda.FunctionUrlAuthType.NONE,
@@ -135,10 +204,10 @@ class LambdaUrlStreamingStack(Stack):
             invoke_mode=_lambda.InvokeMode.RESPONSE_STREAM,
             # CORS configuration for web browser access
             cors=_lambda.FunctionUrlCorsOptions(
-                allowed_origins=["*"],  # Allow all origins for development
+                allowed_origins=allowed_origins,  # "*" unless restricted via context
                 allowed_methods=[_lambda.HttpMethod.POST],  # Only POST method needed
                 allowed_headers=["Content-Type", "Authorization"],  # Required headers
-                allow_credentials=False,  # Must be False when using * for origins
+                allow_credentials=False,  # Tokens travel in the Authorization header
                 max_age=Duration.seconds(
                     86400
                 ),  # Cache preflight response for 24 hours
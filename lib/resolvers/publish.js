@@ -0,0 +1,33 @@
+/**
+ * AWS AppSync JavaScript Resolver - Token Publication
+ *
+ * Resolves the 'publishToken' and 'publishTokens' mutations on the NONE data
+ * source. The processing Lambda calls these mutations with IAM auth; the
+ * result is what AppSync publishes to onTokenReceived subscribers.
+ *
+ * Key Concepts Demonstrated:
+ * 1. NONE Data Sources - The payload is passed straight through to the result
+ * 2. Mutation-Driven Subscriptions - @aws_subscribe fans the result out
+ * 3. Shared Resolver Code - One handler serves both publish mutations
+ *
+ * The arguments are passed through as they are; only the timestamp is added,
+ * once per publish. publishTokens has no 'token' argument, so it defaults to
+ * "" to satisfy the non-null TokenEvent.token field.
+ */
+import { util } from "@aws-appsync/utils";
+
+/**
+ * Build the subscription payload from the mutation arguments
+ */
+export function request(ctx) {
+  return {
+    payload: { token: "", ...ctx.args, timestamp: util.time.nowISO8601() },
+  };
+}
+
+/**
+ * Return the payload unchanged as the mutation result
+ */
+export function response(ctx) {
+  return ctx.result;
+}
@@ -0,0 +1,111 @@
+/**
+ * AWS AppSync JavaScript Resolver - AI Streaming Initiator
+ *
+ * Resolves the 'startStream' mutation by sending the request straight to SQS
+ * through an HTTP data source. AppSync signs the request with SigV4 (service
+ * "sqs") using the data source role, so no Lambda function runs between the
+ * client's mutation and the queue.
+ *
+ * Key Concepts Demonstrated:
+ * 1. APPSYNC_JS Resolvers - Request/response handlers that run inside AppSync
+ * 2. HTTP Data Sources - Calling an AWS service API directly from AppSync
+ * 3. Session Management - Unique session tracking for concurrent users
+ * 4. Immediate Response Pattern - Quick acknowledgment to maintain UX
+ * 5. Queue Sharding - Each session is assigned to one of the queue shards
+ *
+ * Architecture Flow:
+ * Client → AppSync startStream mutation → This resolver → SQS SendMessage → Worker Lambda
+ *     ↓
+ * Immediate response to client with sessionId
+ *     ↓
+ * Client subscribes to onTokenReceived(sessionId) for real-time updates
+ *
+ * The SQS message body matches what the processing Lambda expects:
+ * {"prompt": "...", "sessionId": "...", "requestId": "...", "timestamp": "..."}
+ *
+ * Environment Variables (AppSync API environment, set by CDK):
+ * - STREAMING_QUEUE_SHARDS: Number of queue shards
+ * - STREAMING_QUEUE_URL_<n>: URL of queue shard n (0-based)
+ * - STREAMING_QUEUE_FIFO: "true" when the queues are FIFO queues
+ */
+import { util } from "@aws-appsync/utils";
+
+/**
+ * Build the SQS SendMessage request (AWS JSON 1.0 protocol)
+ */
+export function request(ctx) {
+  const sessionId = util.autoId();
+  const timestamp = util.time.nowISO8601();
+  const prompt = ctx.args.prompt || "Hello, how are you?";
+
+  // Pick the queue shard from the random session ID bits, so sessions are
+  // spread evenly and a session always maps to the same queue
+  const shards = Number(ctx.env.STREAMING_QUEUE_SHARDS || "1");
+  const shard = parseInt(sessionId.substring(sessionId.length - 4), 16) % shards;
+  const queueUrl = ctx.env["STREAMING_QUEUE_URL_" + shard];
+
+  // Kept for the response mapping below
+  ctx.stash.sessionId = sessionId;
+  ctx.stash.timestamp = timestamp;
+
+  const message = {
+    QueueUrl: queueUrl,
+    MessageBody: JSON.stringify({
+      prompt: prompt,
+      sessionId: sessionId,
+      requestId: ctx.request.headers["x-amzn-requestid"] || sessionId,
+      timestamp: timestamp,
+    }),
+    MessageAttributes: {
+      Type: { DataType: "String", StringValue: "llm-streaming-request" },
+    },
+  };
+
+  // FIFO queues: one message group per session, deduplicated by sessionId,
+  // so a retried send never queues (and pays for) the same stream twice
+  if (ctx.env.STREAMING_QUEUE_FIFO === "true") {
+    message.MessageGroupId = sessionId;
+    message.MessageDeduplicationId = sessionId;
+  }
+
+  return {
+    method: "POST",
+    resourcePath: "/",
+    params: {
+      headers: {
+        "content-type": "application/x-amz-json-1.0",
+        "x-amz-target": "AmazonSQS.SendMessage",
+      },
+      body: JSON.stringify(message),
+    },
+  };
+}
+
+/**
+ * Return the immediate startStream response
+ *
+ * The client uses sessionId to subscribe to onTokenReceived. If the message
+ * could not be queued, the same status/error shape as before is returned.
+ */
+export function response(ctx) {
+  const { sessionId, timestamp } = ctx.stash;
+
+  if (ctx.error || ctx.result.statusCode !== 200) {
+    const errorMsg = ctx.error ? ctx.error.message : ctx.result.body;
+    console.log(`Failed to send message to SQS: ${errorMsg}`);
+    return {
+      sessionId: sessionId,
+      status: "error",
+      error: `Failed to initiate streaming: ${errorMsg}`,
+      timestamp: timestamp,
+    };
+  }
+
+  return {
+    sessionId: sessionId,
+    status: "streaming_started",
+    message:
+      "AI streaming session initiated. Subscribe to receive real-time tokens.",
+    timestamp: timestamp,
+  };
+}
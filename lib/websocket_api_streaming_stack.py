@@ -7,15 +7,51 @@ from aws_cdk import (
     aws_iam as iam,
     aws_cognito as cognito,
     aws_logs as logs,
+    aws_sqs as sqs,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_events as events,
+    aws_events_targets as events_targets,
+)
+from aws_cdk.aws_lambda_python_alpha import (
+    BundlingOptions,
+    ICommandHooks,
+    PythonLayerVersion,
 )
-from aws_cdk.aws_lambda_python_alpha import PythonLayerVersion
 from aws_cdk.aws_apigatewayv2_integrations import WebSocketLambdaIntegration
 from aws_cdk.aws_apigatewayv2_authorizers import WebSocketLambdaAuthorizer
 from constructs import Construct
 from cdk_nag import NagSuppressions
+from typing import List
+import jsii
 import os
 
 
+@jsii.implements(ICommandHooks)
+class PruneLayerHooks:
+    """
+    Bundling hooks that shrink a Python layer before it is zipped
+
+    Lambda downloads and extracts the whole layer on every cold start, so
+    files that are never imported at runtime are pure overhead:
+    - Test suites shipped inside the installed packages
+    - Debug symbols in compiled extensions (cryptography's Rust bindings)
+
+    Compiled __pycache__ files are kept on purpose: /opt is read-only in
+    Lambda, so without them every cold start would recompile each module.
+    """
+
+    def before_bundling(self, input_dir: str, output_dir: str) -> List[str]:
+        return []
+
+    def after_bundling(self, input_dir: str, output_dir: str) -> List[str]:
+        return [
+            f"find {output_dir} -type d -name tests -prune -exec rm -rf {{}} +",
+            f"find {output_dir} -name '*.so.debug' -delete",
+            # strip ships with the build image's compiler toolchain
+            f"(find {output_dir} -name '*.so' -exec strip --strip-unneeded {{}} + || true)",
+        ]
+
+
 class WebSocketApiStreamingStack(Stack):
     """
     WebSocket API Streaming Stack
@@ -55,30 +91,82 @@ class WebSocketApiStreamingStack(Stack):
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        # Create a Lambda Layer with the required dependencies
+        # Create Lambda Layers with the required dependencies
         #
         # Python Lambda Layer Pattern:
         # - Separates dependencies from function code for easier management
         # - Reduces deployment package size for individual functions
-        # - Enables sharing common dependencies across multiple functions
         # - Built in a Lambda-like environment to ensure binary compatibility
-        # - Contains PyJWT and Cryptography for JWT token validation
-        websocket_deps_layer = PythonLayerVersion(
+        # - One layer per function that needs it: every cold start downloads
+        #   and extracts all layers attached to the function, so no function
+        #   carries libraries it never imports
+        # - Kept small: tests and debug symbols are pruned after pip install
+        #
+        # Authorizer layer (lambda_functions/websocket_api_layers/authorizer):
+        # - PyJWT and Cryptography for RS256 JWT token validation
+        # - cachetools for the authorizer's verified-token cache
+        # - Attached to the connection lifecycle function ($connect and
+        #   $disconnect themselves only use the standard library)
+        websocket_authorizer_layer = PythonLayerVersion(
             self,
-            "WebSocketDepsLayer",
-            entry="lambda_functions/websocket_api",  # Directory containing requirements.txt
+            "WebSocketAuthorizerLayer",
+            entry="lambda_functions/websocket_api_layers/authorizer",  # Directory containing requirements.txt
             compatible_runtimes=[_lambda.Runtime.PYTHON_3_12],  # Target runtime
-            description="Dependencies for WebSocket API Lambdas (PyJWT, Cryptography)",
+            # Built for arm64 (aarch64 wheels), matching the functions below
+            compatible_architectures=[_lambda.Architecture.ARM_64],
+            bundling=BundlingOptions(command_hooks=PruneLayerHooks()),
+            description="Dependencies for the WebSocket authorizer (PyJWT, Cryptography, cachetools)",
         )
 
-        # Define the Lambda code asset
+        # Stream layer (lambda_functions/websocket_api_layers/stream):
+        # - orjson for fast encoding of streamed token messages
+        websocket_stream_layer = PythonLayerVersion(
+            self,
+            "WebSocketStreamLayer",
+            entry="lambda_functions/websocket_api_layers/stream",  # Directory containing requirements.txt
+            compatible_runtimes=[_lambda.Runtime.PYTHON_3_12],  # Target runtime
+            # Built for arm64 (aarch64 wheels), matching the functions below
+            compatible_architectures=[_lambda.Architecture.ARM_64],
+            bundling=BundlingOptions(command_hooks=PruneLayerHooks()),
+            description="Dependencies for the WebSocket stream handler (orjson)",
+        )
+
+        # Define the Lambda code assets
         #
         # Code Organization:
-        # - Single code asset for all WebSocket Lambda functions
-        # - Each function uses a different entry point (handler)
-        # - Enables sharing common utility code across functions
-        # - More maintainable than separate code packages
-        websocket_api_asset = _lambda.Code.from_asset("lambda_functions/websocket_api")
+        # - Handlers live side by side in lambda_functions/websocket_api
+        # - Each function gets its own asset containing only its handler module,
+        #   so e.g. $connect does not download the Bedrock streaming code
+        # - Everything else in the directory is excluded ("!" re-includes a file);
+        #   no Docker bundling step is needed
+        # - A helper module shared by several handlers would be added to their
+        #   include lists
+        def websocket_api_asset(*files: str) -> _lambda.Code:
+            return _lambda.Code.from_asset(
+                "lambda_functions/websocket_api",
+                exclude=["*", *(f"!{name}" for name in files)],
+            )
+
+        # Optional bundled Cognito JWKS for the authorizer
+        #
+        # Signing Key Bundling:
+        # - The authorizer normally downloads the JWKS over HTTPS during INIT
+        # - If jwks_bundle.json sits next to the handlers it ships in the code
+        #   asset and is read from disk instead, removing that round trip
+        # - The user pool is created in the same deployment, so its ID is not
+        #   known at synth time; the file is fetched after the first deploy
+        #   (see README) and picked up by the next one
+        # - Unknown kids (key rotation, stale bundle) still fall back to a download
+        authorizer_environment = {
+            # Cognito configuration for token validation
+            "USER_POOL_ID": user_pool.user_pool_id,
+            "USER_POOL_CLIENT_ID": user_pool_client.user_pool_client_id,
+        }
+        if os.path.isfile("lambda_functions/websocket_api/jwks_bundle.json"):
+            authorizer_environment["JWKS_BUNDLE_PATH"] = "/var/task/jwks_bundle.json"
+            lifecycle_files = ("jwks_bundle.json",)
+        else:
+            lifecycle_files = ()
 
         # Create IAM role for Lambda functions
         #
@@ -126,93 +214,272 @@ class WebSocketApiStreamingStack(Stack):
             },
         )
 
-        # Lambda Authorizer function
+        # Memory (and the proportional CPU share) for the connection lifecycle
+        # (authorizer) and stream Lambdas
+        #
+        # Lambda allocates CPU in proportion to memory, and cold starts are
+        # CPU-bound: importing the layer packages, building RSA keys and
+        # creating the Bedrock client all run on that CPU share. At the 128 MB
+        # default the INIT phase of these two functions is several times
+        # slower than at 512-1024 MB, which shows up directly as connection
+        # and first-token latency. Measure before lowering these values; set
+        # them in cdk.json or with e.g. `cdk deploy -c websocket_stream_memory_mb=1536`.
+        authorizer_memory_mb = int(
+            self.node.try_get_context("websocket_authorizer_memory_mb") or 512
+        )
+        stream_memory_mb = int(
+            self.node.try_get_context("websocket_stream_memory_mb") or 1024
+        )
+
+        # Connection lifecycle Lambda function
         #
         # WebSocket Authorization Pattern:
         # - Unlike HTTP APIs where auth headers are used, WebSockets use query parameters
-        # - The authorizer function runs on EVERY connection attempt
+        # - The authorizer runs on EVERY connection attempt
         # - It validates the JWT token against Cognito user pool
         # - Security is enforced at the connection level, not at each message
         # - This "authorize-once" pattern is more efficient than per-message auth
         # - A denied connection attempt never establishes the WebSocket
-        authorizer_function = _lambda.Function(
+        #
+        # WebSocket $connect / $disconnect Route Handlers:
+        # - $connect runs AFTER the authorizer has approved the connection and
+        #   must return 200 for the connection to be established
+        # - $disconnect is triggered when a client disconnects or times out
+        #   (10 minutes idle by default) and performs cleanup
+        # - Both receive the connectionId that uniquely identifies the client
+        #
+        # One Function, Three Handlers:
+        # - lifecycle.py dispatches authorizer, $connect and $disconnect events
+        #   to authorizer.py, connect.py and disconnect.py
+        # - $connect immediately follows a successful authorization, so it is
+        #   served by an already-warm environment instead of cold-starting a
+        #   second function, and the signing keys are loaded once for all three
+        lifecycle_function = _lambda.Function(
             self,
-            "WebSocketAuthorizer",
+            "WebSocketLifecycleFunction",
             runtime=_lambda.Runtime.PYTHON_3_12,
-            handler="authorizer.lambda_handler",
-            code=websocket_api_asset,
+            # Graviton: lower price per GB-second, and faster RSA and JSON work
+            architecture=_lambda.Architecture.ARM_64,
+            handler="lifecycle.lambda_handler",
+            code=websocket_api_asset(
+                "lifecycle.py",
+                "authorizer.py",
+                "connect.py",
+                "disconnect.py",
+                *lifecycle_files,
+            ),
             role=lambda_role,
-            layers=[websocket_deps_layer],  # Uses layer for JWT validation
+            layers=[websocket_authorizer_layer],  # Uses layer for JWT validation
+            memory_size=authorizer_memory_mb,
             timeout=Duration.seconds(30),  # Auth should complete quickly
-            environment={
-                # Cognito configuration for token validation
-                "USER_POOL_ID": user_pool.user_pool_id,
-                "USER_POOL_CLIENT_ID": user_pool_client.user_pool_client_id,
-            },
+            # No tracing on the connection path (see the stream function)
+            tracing=_lambda.Tracing.DISABLED,
+            environment=authorizer_environment,
         )
 
-        # Connect Lambda function
+        # Queued streaming (opt-in)
         #
-        # WebSocket $connect Route Handler:
-        # - Triggered when a client establishes a WebSocket connection
-        # - Runs AFTER the authorizer has approved the connection
-        # - Receives the connectionId that uniquely identifies this client
-        # - Can store connection metadata in DynamoDB (connectionId, user info, etc.)
-        # - Could initialize session state or perform additional setup
-        # - Must return 200 for the connection to be successfully established
-        connect_function = _lambda.Function(
-            self,
-            "ConnectFunction",
-            runtime=_lambda.Runtime.PYTHON_3_12,
-            handler="connect.lambda_handler",
-            code=websocket_api_asset,
-            role=lambda_role,
-            layers=[websocket_deps_layer],  # Access to common utilities
+        # `cdk deploy -c websocket_stream_queue=true` splits the stream route in two:
+        # - The "stream" route function (enqueue.py) only validates the message
+        #   and enqueues it to SQS, so the route integration returns within
+        #   milliseconds
+        # - A worker function triggered by the queue invokes Bedrock and posts
+        #   the tokens to the connection, exactly as the direct handler does
+        # - Bursts of requests wait in the queue instead of being throttled,
+        #   and the event source caps the number of concurrent Bedrock streams
+        # - The cost is one extra hop (an SQS send and poll) before the first token
+        stream_queue_enabled = (
+            str(self.node.try_get_context("websocket_stream_queue")).lower() == "true"
         )
 
-        # Disconnect Lambda function
+        # Batching and compression settings shared by both stream handlers
+        stream_environment = {
+            # Tokens are sent to the client in batches of up to 64 tokens
+            # or 2048 characters, or after 50 ms, whichever comes first
+            "STREAM_BATCH_MAX_TOKENS": "64",
+            "STREAM_BATCH_MAX_CHARS": "2048",
+            "STREAM_BATCH_MAX_MS": "50",
+            # Batches of 512 bytes or more are sent gzip+base64 encoded
+            # ("0" sends every message uncompressed)
+            "STREAM_COMPRESS_THRESHOLD_BYTES": "512",
+        }
+
+        if stream_queue_enabled:
+            # Dead-letter queue for requests whose worker crashed or timed out
+            stream_dlq = sqs.Queue(
+                self,
+                "StreamJobsDLQ",
+                retention_period=Duration.days(14),  # Keep for analysis
+                enforce_ssl=True,
+            )
+
+            # Request queue between the stream route and the worker
+            # - Visibility timeout is 6x the worker timeout (AWS guidance for
+            #   Lambda event sources), so a message is never redelivered while
+            #   a worker may still be streaming it
+            # - A failed request goes to the DLQ after one attempt: a retry
+            #   would replay tokens the client has already received
+            # - Short retention: a prompt nobody answered within the hour is
+            #   of no use to a chat client
+            stream_queue = sqs.Queue(
+                self,
+                "StreamJobs",
+                visibility_timeout=Duration.minutes(30),
+                retention_period=Duration.hours(1),
+                enforce_ssl=True,
+                dead_letter_queue=sqs.DeadLetterQueue(
+                    max_receive_count=1, queue=stream_dlq
+                ),
+            )
+
+            # Stream worker Lambda function
+            #
+            # SQS-Triggered Streaming:
+            # - Same streaming code as the direct-mode stream function, entered
+            #   through queue_handler
+            # - Holds the Bedrock and ManageConnections work of the stream route,
+            #   and with it the dependency layer, memory and tracing settings
+            bedrock_function = _lambda.Function(
+                self,
+                "StreamWorkerFunction",
+                runtime=_lambda.Runtime.PYTHON_3_12,
+                architecture=_lambda.Architecture.ARM_64,
+                handler="stream.queue_handler",
+                code=websocket_api_asset("stream.py"),
+                role=lambda_role,
+                layers=[websocket_stream_layer],
+                memory_size=stream_memory_mb,
+                timeout=Duration.minutes(5),
+                tracing=_lambda.Tracing.ACTIVE,
+                environment=stream_environment,
+            )
+
+            # Stream Lambda function (queued mode)
+            #
+            # Thin Enqueuer:
+            # - enqueue.py validates the message and sends it to the queue;
+            #   standard library and botocore only, so no dependency layer
+            # - 256 MB: the work is trivial, but importing botocore and creating
+            #   the SQS client is CPU-bound, and at 128 MB that cold start would
+            #   add about a second in front of every queued first token
+            # - Short timeout and no tracing: like the lifecycle function it
+            #   does only milliseconds of work per message
+            stream_function = _lambda.Function(
+                self,
+                "StreamFunction",
+                runtime=_lambda.Runtime.PYTHON_3_12,
+                architecture=_lambda.Architecture.ARM_64,
+                handler="enqueue.lambda_handler",
+                code=websocket_api_asset("enqueue.py"),
+                role=lambda_role,
+                memory_size=256,
+                timeout=Duration.seconds(10),
+                tracing=_lambda.Tracing.DISABLED,
+                environment={"STREAM_QUEUE_URL": stream_queue.queue_url},
+            )
+            stream_queue.grant_send_messages(stream_function)
+        else:
+            # Stream Lambda function
+            #
+            # Custom "stream" Route Handler:
+            # - Handles messages sent to the "stream" route with JSON format:
+            #   {"action": "stream", "data": {"prompt": "..."}}
+            # - Receives the connectionId, enabling responses to specific client
+            # - Invokes Bedrock with streaming response mode
+            # - Forwards tokens to the client as they arrive using PostToConnection API
+            # - Coalesces adjacent tokens into batched "tokens" messages on the same socket
+            # - Extended timeout (5 mins) allows for longer LLM generation sessions
+            # - Maintains connectionId context throughout the streaming process
+            stream_function = _lambda.Function(
+                self,
+                "StreamFunction",
+                runtime=_lambda.Runtime.PYTHON_3_12,
+                # Graviton: lower price per GB-second, and faster RSA and JSON work
+                architecture=_lambda.Architecture.ARM_64,
+                handler="stream.lambda_handler",
+                code=websocket_api_asset("stream.py"),
+                role=lambda_role,
+                layers=[websocket_stream_layer],  # orjson for token messages
+                memory_size=stream_memory_mb,
+                timeout=Duration.minutes(5),  # Extended timeout for streaming AI responses
+                # X-Ray Tracing:
+                # - Active tracing breaks a slow stream down into its Bedrock call,
+                #   token posts and init phase; on a minutes-long invocation the
+                #   tracing overhead is negligible
+                # - The lifecycle function runs on every connection attempt and
+                #   does only milliseconds of work, so it is explicitly not traced
+                #   to keep its cold starts and per-connection cost minimal
+                tracing=_lambda.Tracing.ACTIVE,
+                environment=stream_environment,
+            )
+
+            # The stream function itself streams from Bedrock
+            bedrock_function = stream_function
+
+        # Optional provisioned concurrency for the Bedrock streaming Lambda
         #
-        # WebSocket $disconnect Route Handler:
-        # - Triggered automatically when a client disconnects
-        # - Also triggered on connection timeout (10 minutes by default)
-        # - Receives the connectionId of the terminated connection
-        # - Performs cleanup operations (remove connectionId from database)
-        # - Ensures no orphaned connection resources remain
-        # - Can trigger final actions when a user session ends
-        disconnect_function = _lambda.Function(
-            self,
-            "DisconnectFunction",
-            runtime=_lambda.Runtime.PYTHON_3_12,
-            handler="disconnect.lambda_handler",
-            code=websocket_api_asset,
-            role=lambda_role,
-            layers=[websocket_deps_layer],  # Access to common utilities
+        # Warm Pool Pattern:
+        # - A cold start of the stream function (layer, botocore, Bedrock client)
+        #   sits directly in front of the first token of a chat
+        # - Provisioned concurrency keeps that many execution environments
+        #   initialized at all times, billed per hour whether used or not
+        # - It applies to a published version, so the "stream" route (or, in
+        #   queued mode, the queue's event source) invokes the "live" alias
+        #   instead of $LATEST
+        # - Off by default (0) so development deployments carry no standing cost;
+        #   enable with e.g. `cdk deploy -c websocket_stream_provisioned_concurrency=2`
+        stream_provisioned_concurrency = int(
+            self.node.try_get_context("websocket_stream_provisioned_concurrency") or 0
         )
+        if stream_provisioned_concurrency > 0:
+            bedrock_target = _lambda.Alias(
+                self,
+                "StreamLive",
+                alias_name="live",
+                version=bedrock_function.current_version,
+                provisioned_concurrent_executions=stream_provisioned_concurrency,
+            )
+        else:
+            bedrock_target = bedrock_function
+
+        if stream_queue_enabled:
+            # One request per invocation: each Bedrock stream is independent,
+            # and the concurrency cap bounds parallel streams (minimum 2)
+            bedrock_target.add_event_source(
+                lambda_event_sources.SqsEventSource(
+                    stream_queue,
+                    batch_size=1,
+                    max_concurrency=int(
+                        self.node.try_get_context("websocket_stream_max_concurrency")
+                        or 10
+                    ),
+                )
+            )
+            stream_target = stream_function
+        else:
+            stream_target = bedrock_target
 
-        # Stream Lambda function
+        # Keep-warm schedule (opt-in)
         #
-        # Custom "stream" Route Handler:
-        # - Handles messages sent to the "stream" route with JSON format:
-        #   {"action": "stream", "data": {"prompt": "..."}}
-        # - Receives the connectionId, enabling responses to specific client
-        # - Invokes Bedrock with streaming response mode
-        # - Forwards each token to client as it arrives using PostToConnection API
-        # - Uses PostToConnection to send individual token messages back on same socket
-        # - Extended timeout (5 mins) allows for longer LLM generation sessions
-        # - Maintains connectionId context throughout the streaming process
-        stream_function = _lambda.Function(
-            self,
-            "StreamFunction",
-            runtime=_lambda.Runtime.PYTHON_3_12,
-            handler="stream.lambda_handler",
-            code=websocket_api_asset,
-            role=lambda_role,
-            layers=[websocket_deps_layer],
-            timeout=Duration.minutes(5),  # Extended timeout for streaming AI responses
-            environment={
-                # Environment variables could be added here for Bedrock configuration
-            },
-        )
+        # `cdk deploy -c websocket_stream_keep_warm=true` invokes the Bedrock
+        # streaming function every minute with {"warmup": true}:
+        # - The handler answers with a 1-token Bedrock call, keeping one
+        #   execution environment and its Bedrock HTTPS connection warm
+        # - It only keeps ONE environment warm; concurrent chats beyond that
+        #   still cold start (use provisioned concurrency for a real pool)
+        # - Each ping is a billed (tiny) model invocation, hence off by default
+        if str(self.node.try_get_context("websocket_stream_keep_warm")).lower() == "true":
+            events.Rule(
+                self,
+                "StreamKeepWarm",
+                schedule=events.Schedule.rate(Duration.minutes(1)),
+                targets=[
+                    events_targets.LambdaFunction(
+                        bedrock_target,
+                        event=events.RuleTargetInput.from_object({"warmup": True}),
+                    )
+                ],
+            )
 
         # Create WebSocket API
         #
@@ -227,6 +494,13 @@ class WebSocketApiStreamingStack(Stack):
             description="WebSocket API for streaming LLM responses",
         )
 
+        # The authorizer's policies always cover the same resource, the
+        # $connect route of this API (any stage), so the ARN is passed in
+        # once and the policy documents are built once per execution environment
+        lifecycle_function.add_environment(
+            "API_ARN", websocket_api.arn_for_execute_api_v2("$connect")
+        )
+
         # Create Lambda authorizer
         #
         # WebSocket Authorization Pattern:
@@ -238,7 +512,7 @@ class WebSocketApiStreamingStack(Stack):
         # This means clients connect with: wss://api-id.execute-api.region.amazonaws.com/stage?token=JWT_TOKEN
         authorizer = WebSocketLambdaAuthorizer(
             "LambdaAuthorizer",
-            authorizer_function,
+            lifecycle_function,
             identity_source=["route.request.querystring.token"],
         )
 
@@ -253,7 +527,7 @@ class WebSocketApiStreamingStack(Stack):
         websocket_api.add_route(
             "$connect",
             integration=WebSocketLambdaIntegration(
-                "ConnectIntegration", connect_function
+                "ConnectIntegration", lifecycle_function
             ),
             authorizer=authorizer,  # Only $connect route needs authorization
         )
@@ -265,7 +539,7 @@ class WebSocketApiStreamingStack(Stack):
         websocket_api.add_route(
             "$disconnect",
             integration=WebSocketLambdaIntegration(
-                "DisconnectIntegration", disconnect_function
+                "DisconnectIntegration", lifecycle_function
             ),
         )
 
@@ -276,7 +550,7 @@ class WebSocketApiStreamingStack(Stack):
         websocket_api.add_route(
             "stream",
             integration=WebSocketLambdaIntegration(
-                "StreamIntegration", stream_function
+                "StreamIntegration", stream_target
             ),
         )
 
@@ -345,11 +619,9 @@ class WebSocketApiStreamingStack(Stack):
 
         # Suppress Lambda runtime findings for Python functions
         for func in [
-            authorizer_function,
-            connect_function,
-            disconnect_function,
+            lifecycle_function,
             stream_function,
-        ]:
+        ] + ([bedrock_function] if stream_queue_enabled else []):
             NagSuppressions.add_resource_suppressions(
                 func,
                 [
@@ -386,5 +658,9 @@ class WebSocketApiStreamingStack(Stack):
             self,
             "WebSocketApiUrl",
             value=f"wss://{websocket_api.api_id}.execute-api.{self.region}.amazonaws.com/prod",
-            description="WebSocket API URL for streaming Amazon Bedrock responses (append ?token=JWT_TOKEN for auth)",
+            description=(
+                "WebSocket API URL for streaming Amazon Bedrock responses (append ?token=JWT_TOKEN for auth). "
+                'Messages of the form {"enc": "gzip+b64", "data": ...} carry a gzip-compressed, '
+                "base64-encoded message: base64-decode and gunzip data, then parse it as JSON"
+            ),
         )
@@ -5,6 +5,7 @@ import {
   type Client,
   type GraphQLResult,
 } from "aws-amplify/api";
+import { events } from "aws-amplify/data";
 import { signIn, signOut, getCurrentUser } from "aws-amplify/auth";
 import type { AuthUser, SignInInput } from "aws-amplify/auth";
 import type {
@@ -21,6 +22,8 @@ interface SubscriptionData {
   onTokenReceived: {
     sessionId: string;
     token: string;
+    // Present when the processor published a batch via publishTokens
+    tokens?: string[] | null;
     isComplete: boolean;
     timestamp: string;
   };
@@ -34,6 +37,7 @@ const AppSyncClient: React.FC = () => {
     userPoolId: envConfig.userPoolId,
     userPoolClientId: envConfig.userPoolClientId,
     apiUrl: envConfig.appSyncApiUrl,
+    eventApiUrl: envConfig.appSyncEventApiUrl,
   });
 
   const [connectionStatus, setConnectionStatus] = useState<ConnectionStatus>({
@@ -90,6 +94,16 @@ const AppSyncClient: React.FC = () => {
             region: config.region,
             defaultAuthMode: "userPool",
           },
+          // Event API channels, when the stack was deployed with them
+          ...(config.eventApiUrl
+            ? {
+                Events: {
+                  endpoint: config.eventApiUrl,
+                  region: config.region,
+                  defaultAuthMode: "userPool" as const,
+                },
+              }
+            : {}),
         },
         Auth: {
           Cognito: {
@@ -287,12 +301,39 @@ const AppSyncClient: React.FC = () => {
         addDebugLog(`❌ GraphQL test failed: ${errorMessage}`, "error");
       }
 
+      // Event API deployments publish tokens to a per-session channel
+      // instead of the onTokenReceived subscription
+      if (config.eventApiUrl) {
+        addDebugLog("🔔 Subscribing to Event API channel...", "info");
+        const channel = await events.connect(
+          `/bedrock-stream/${sessionData.sessionId}`
+        );
+        const channelSubscription = channel.subscribe({
+          // Each channel message wraps one published event
+          next: (data: { event: SubscriptionData["onTokenReceived"] }) =>
+            handleTokenReceived(data.event),
+          error: (err: unknown) => {
+            addDebugLog(`❌ Channel error: ${String(err)}`, "error");
+            setConnectionStatus((prev) => ({ ...prev, isStreaming: false }));
+          },
+        });
+        subscription.current = {
+          unsubscribe: () => {
+            channelSubscription.unsubscribe();
+            channel.close();
+          },
+        };
+        addDebugLog("✅ Channel subscription created successfully", "success");
+        return;
+      }
+
       // Subscribe to token stream with sessionId filtering
       const TOKEN_SUBSCRIPTION = `
         subscription OnTokenReceived($sessionId: String!) {
           onTokenReceived(sessionId: $sessionId) {
             sessionId
             token
+            tokens
             isComplete
             timestamp
           }
@@ -373,25 +414,31 @@ const AppSyncClient: React.FC = () => {
   const handleTokenReceived = (
     tokenData: SubscriptionData["onTokenReceived"]
   ) => {
+    // Batched events carry several tokens; concatenate them in order
+    const batch = tokenData.tokens ?? null;
     const token: StreamToken = {
-      token: tokenData.token,
+      token: batch ? batch.join("") : tokenData.token,
       timestamp: new Date(tokenData.timestamp),
       isComplete: tokenData.isComplete,
     };
 
+    // The final batch carries the last tokens (or an error message) together
+    // with isComplete, so append its text before handling completion
+    if (token.token) {
+      setStreamingOutput((prev) => prev + token.token);
+      setTokenCount((prev) => prev + (batch ? batch.length : 1));
+      addDebugLog(
+        `📥 Token received: ${token.token.substring(0, 50)}...`,
+        "info"
+      );
+    }
+
     if (token.isComplete) {
       addDebugLog("🏁 Streaming completed", "success");
       setConnectionStatus((prev) => ({ ...prev, isStreaming: false }));
       setCurrentSession((prev) =>
         prev ? { ...prev, status: "completed", endTime: new Date() } : null
       );
-    } else {
-      setStreamingOutput((prev) => prev + token.token);
-      setTokenCount((prev) => prev + 1);
-      addDebugLog(
-        `📥 Token received: ${token.token.substring(0, 50)}...`,
-        "info"
-      );
     }
   };
 
@@ -442,6 +489,18 @@ const AppSyncClient: React.FC = () => {
             placeholder="https://xxxxxxxxx.appsync-api.region.amazonaws.com/graphql"
           />
         </div>
+        <div className="input-group">
+          <label htmlFor="eventApiUrl">Event API URL (optional):</label>
+          <input
+            type="url"
+            id="eventApiUrl"
+            value={config.eventApiUrl}
+            onChange={(e) =>
+              setConfig((prev) => ({ ...prev, eventApiUrl: e.target.value }))
+            }
+            placeholder="https://xxxxxxxxx.appsync-api.region.amazonaws.com/event"
+          />
+        </div>
         <div className="input-row">
           <div className="input-group">
             <label htmlFor="userPoolId">User Pool ID:</label>
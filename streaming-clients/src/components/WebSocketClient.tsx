@@ -14,6 +14,21 @@ import type {
 } from "../types";
 import { getEnvConfig } from "../lib/env";
 
+// Large "tokens" batches arrive as {"enc": "gzip+b64", "data": "..."}:
+// base64-decode the data, gunzip it with the browser's DecompressionStream
+// and parse the result as the actual message
+const decodeMessage = async (raw: string): Promise<WebSocketMessage> => {
+  const message = JSON.parse(raw);
+  if (message.enc !== "gzip+b64") {
+    return message;
+  }
+  const bytes = Uint8Array.from(atob(message.data), (c) => c.charCodeAt(0));
+  const stream = new Blob([bytes])
+    .stream()
+    .pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(stream).text());
+};
+
 const WebSocketClient: React.FC = () => {
   const envConfig = getEnvConfig();
 
@@ -45,6 +60,9 @@ const WebSocketClient: React.FC = () => {
   const [authToken, setAuthToken] = useState<string | null>(null);
 
   const websocket = useRef<WebSocket | null>(null);
+  // Compressed messages are decoded asynchronously; chaining every message
+  // on this promise keeps them in arrival order
+  const messageQueue = useRef<Promise<void>>(Promise.resolve());
 
   const checkCurrentUser = useCallback(async () => {
     try {
@@ -258,15 +276,16 @@ const WebSocketClient: React.FC = () => {
       };
 
       websocket.current.onmessage = (event) => {
-        try {
-          const message: WebSocketMessage = JSON.parse(event.data);
-          handleWebSocketMessage(message);
-        } catch {
-          addDebugLog(
-            `❌ Failed to parse WebSocket message: ${event.data}`,
-            "error"
-          );
-        }
+        messageQueue.current = messageQueue.current.then(async () => {
+          try {
+            handleWebSocketMessage(await decodeMessage(event.data));
+          } catch {
+            addDebugLog(
+              `❌ Failed to parse WebSocket message: ${event.data}`,
+              "error"
+            );
+          }
+        });
       };
 
       websocket.current.onclose = (event) => {
@@ -341,6 +360,20 @@ const WebSocketClient: React.FC = () => {
         }
         break;
 
+      case "tokens":
+        // Batched tokens: the server coalesces several AI tokens into one
+        // WebSocket message to reduce round trips, so append them in order
+        if (message.tokens && message.tokens.length > 0) {
+          const text = message.tokens.join("");
+          setStreamingOutput((prev) => prev + text);
+          setTokenCount((prev) => prev + message.tokens!.length);
+          addDebugLog(
+            `📝 ${message.tokens.length} tokens received: ${text.substring(0, 50)}...`,
+            "info"
+          );
+        }
+        break;
+
       case "complete":
         addDebugLog("🏁 Streaming completed", "success");
         setConnectionStatus((prev) => ({ ...prev, isStreaming: false }));
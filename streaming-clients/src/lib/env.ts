@@ -11,6 +11,10 @@ export const getEnvConfig = () => ({
   
   // AppSync Configuration
   appSyncApiUrl: import.meta.env.VITE_APPSYNC_API_URL || "https://xxxxxxxx.appsync-api.us-east-1.amazonaws.com/graphql",
+
+  // AppSync Event API (optional, deployed with -c appsync_event_api=true)
+  // When set, tokens are received from Event API channels instead of GraphQL
+  appSyncEventApiUrl: import.meta.env.VITE_APPSYNC_EVENT_API_URL || "",
   
   // Lambda URL Configuration
   lambdaFunctionUrl: import.meta.env.VITE_LAMBDA_FUNCTION_URL || "https://xxxxxxxxxx.lambda-url.us-east-1.on.aws/",
@@ -3,6 +3,8 @@ export interface AppSyncConfig {
   userPoolId: string;
   userPoolClientId: string;
   apiUrl: string;
+  // Event API endpoint; empty to receive tokens via GraphQL subscriptions
+  eventApiUrl: string;
 }
 
 export interface WebSocketConfig {
@@ -20,11 +22,13 @@ export interface LambdaUrlConfig {
 }
 
 export interface WebSocketMessage {
-  type: "start" | "stream" | "complete" | "error" | "token";
+  type: "start" | "stream" | "complete" | "error" | "token" | "tokens";
   sessionId?: string;
   prompt?: string;
   error?: string;
   token?: string;
+  tokens?: string[];
+  sequence?: number;
   timestamp: string;
 }
 